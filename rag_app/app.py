@@ -3,6 +3,7 @@ FastAPI application for the RAG web service.
 Provides endpoints for document ingestion, querying, and health checks.
 """
 
+import asyncio
 import logging
 import time
 from pathlib import Path
@@ -12,18 +13,19 @@ from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, Form
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from openai import OpenAI
 
 from config import settings
 from models import (
     IngestRequest, IngestResponse, QueryRequest, QueryResponse,
-    HealthResponse, ErrorResponse
+    HealthResponse, ErrorResponse, DOC_ID_PATTERN
 )
 from ingest import DocumentIngester
 from retrieve import HybridRetriever
 from answer import AnswerGenerator
 from debug_query import QueryDebugger
 from utils.logging import setup_logging, log_timing, log_error
+from utils.openai_client import get_openai_client
+from utils.uploads import save_upload, ingest_guard, IngestInProgressError, UploadTooLargeError
 
 
 # Setup logging
@@ -55,8 +57,8 @@ static_path = Path(__file__).parent / "static"
 if static_path.exists():
     app.mount("/static", StaticFiles(directory=str(static_path)), name="static")
 
-# Initialize OpenAI client
-openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
+# Initialize the shared OpenAI client
+openai_client = get_openai_client()
 
 # Initialize services
 ingester = DocumentIngester(openai_client)
@@ -81,6 +83,11 @@ async def startup_event():
     else:
         logger.info("Skipping OpenAI API key validation for test environment")
     
+    # Load the reranker model now rather than on the first query
+    if settings.PREWARM:
+        await asyncio.to_thread(lambda: retriever.reranker)
+        logger.info("Reranker prewarmed")
+    
     # Data directories are created on import in config.py
     logger.info("Application startup completed")
 
@@ -104,7 +111,8 @@ async def serve_frontend():
 @app.post("/ingest", response_model=IngestResponse)
 async def ingest_document(
     doc_id: str = Form(...),
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    force_refresh: bool = Form(False)
 ):
     """
     Ingest a PDF document into the RAG system.
@@ -112,6 +120,7 @@ async def ingest_document(
     Args:
         doc_id: Unique document identifier
         file: PDF file to ingest
+        force_refresh: Re-parse the PDF even if identical content was parsed before
         
     Returns:
         IngestResponse with processing results
@@ -121,8 +130,7 @@ async def ingest_document(
     
     try:
         # Validate doc_id format
-        import re
-        if not re.match(r'^[a-zA-Z0-9_\-]+$', doc_id):
+        if not DOC_ID_PATTERN.fullmatch(doc_id):
             raise HTTPException(
                 status_code=400,
                 detail="doc_id must contain only alphanumeric characters, underscores, and hyphens"
@@ -135,16 +143,25 @@ async def ingest_document(
                 detail="File must be a PDF (application/pdf)"
             )
         
-        # Save uploaded file
-        pdf_path = settings.paths["docs"] / f"{doc_id}.pdf"
-        with open(pdf_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        # One ingestion per doc_id at a time, from upload through indexing
+        with ingest_guard(doc_id):
+            # Stream uploaded file to disk
+            pdf_path = settings.paths["docs"] / f"{doc_id}.pdf"
+            try:
+                file_size, content_hash = await save_upload(file, pdf_path, settings.MAX_UPLOAD_SIZE)
+            except UploadTooLargeError:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"File size exceeds maximum allowed size of {settings.MAX_UPLOAD_SIZE / (1024*1024):.1f}MB"
+                )
         
-        logger.info(f"Saved uploaded file doc_id={doc_id}, file_size={len(content)}")
+            logger.info(f"Saved uploaded file doc_id={doc_id}, file_size={file_size}")
         
-        # Ingest document
-        response = ingester.ingest_document(pdf_path, doc_id)
+            # Ingest document off the event loop; parsing, embedding and indexing all block
+            response = await asyncio.to_thread(
+                ingester.ingest_document, pdf_path, doc_id,
+                cache_key=content_hash, force_refresh=force_refresh
+            )
         
         # Log total processing time
         total_time = time.time() - start_time
@@ -154,6 +171,11 @@ async def ingest_document(
         
     except HTTPException:
         raise
+    except IngestInProgressError:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Document {doc_id} is already being ingested"
+        )
     except Exception as e:
         log_error(logger, e, "document_ingestion")
         raise HTTPException(status_code=500, detail="Document ingestion failed")
@@ -176,7 +198,7 @@ async def query_document(request: QueryRequest):
     try:
         # Retrieve relevant chunks
         retrieve_start = time.time()
-        retrieved_results = retriever.retrieve(
+        retrieved_results = await retriever.aretrieve(
             doc_id=request.doc_id,
             question=request.question,
             k=request.k
@@ -186,7 +208,9 @@ async def query_document(request: QueryRequest):
         
         # Generate answer
         answer_start = time.time()
-        answer_result = answer_generator.generate_answer(
+        # The chat completion call blocks, so it runs off the event loop
+        answer_result = await asyncio.to_thread(
+            answer_generator.generate_answer,
             question=request.question,
             retrieved_results=retrieved_results,
             doc_id=request.doc_id
@@ -234,7 +258,8 @@ async def debug_query(request: QueryRequest):
         debugger = QueryDebugger(openai_client)
         
         # Run debug analysis
-        debug_result = debugger.debug_query(
+        debug_result = await asyncio.to_thread(
+            debugger.debug_query,
             doc_id=request.doc_id,
             question=request.question,
             k=request.k
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from pathlib import Path
+from typing import Optional
 
 class Settings(BaseSettings):
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8"}
@@ -14,6 +15,19 @@ class Settings(BaseSettings):
     RERANK_CANDIDATES: int = 50  # More candidates for reranking
     RERANK_TOP_N: int = 8  # More final results
     CONFIDENCE_THRESHOLD: float = 0.2  # Lower threshold for more results
+    RERANKER_ONNX_PATH: str = ""  # Directory with an ONNX (e.g. INT8) reranker export; empty uses CrossEncoder
+
+    SEMANTIC_CACHE_SIZE: int = 4096  # Max cached queries per process
+    SEMANTIC_CACHE_THRESHOLD: float = 0.97  # Min cosine similarity for a cache hit
+    SEMANTIC_CACHE_TTL: int = 3600  # Seconds before a cached result expires
+    TILED_SEARCH_MIN_VECTORS: int = 50_000  # Use multi-threaded tiled search above this size
+    FAISS_USE_GPU: bool = False  # Move large indices to a CUDA device when available
+    FAISS_GPU_MIN_VECTORS: int = 200_000  # Only indices above this size are moved to the GPU
+
+    MAX_UPLOAD_SIZE: int = 100 * 1024 * 1024  # Largest accepted PDF upload, in bytes
+    PDF_BACKEND: str = "pymupdf"  # "pdfium" uses pypdfium2's lighter text extraction, without section detection
+    MAX_PAGES_PER_DOC: Optional[int] = None  # Only the first N pages of a PDF are ingested; None ingests all
+    PREWARM: bool = False  # Load services and the reranker at startup instead of on the first request
 
     DATA_DIR: str = "data"
 
@@ -26,6 +40,7 @@ class Settings(BaseSettings):
             "indices": root / "indices",
             "sqlite": root / "sqlite",
             "chunks": root / "chunks",
+            "cache": root / "cache",
         }
 
 settings = Settings()  # loads from env
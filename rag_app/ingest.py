@@ -3,18 +3,19 @@ Document ingestion pipeline.
 Handles PDF parsing, chunking, embedding, and indexing.
 """
 
+import asyncio
 import logging
 import time
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 
 import pandas as pd
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
 from config import settings
 from models import IngestResponse
 from utils.parsing import PDFParser
-from utils.chunking import TokenAwareChunker
+from utils.chunking import TokenAwareChunker, ChunkBatch
 from store.faiss_store import FAISSStore
 from store.sqlite_store import SQLiteStore
 from utils.logging import log_timing
@@ -26,18 +27,22 @@ logger = logging.getLogger(__name__)
 class DocumentIngester:
     """Document ingestion pipeline."""
     
-    def __init__(self, openai_client: OpenAI):
+    def __init__(self, openai_client: OpenAI, async_openai_client: Optional[AsyncOpenAI] = None):
         """
         Initialize the document ingester.
         
         Args:
             openai_client: OpenAI client for embeddings
+            async_openai_client: Async OpenAI client for aingest_document, used on a
+                single event loop. When None, each aingest_document call creates and
+                closes its own client from openai_client's API key
         """
         self.openai_client = openai_client
+        self.async_openai_client = async_openai_client
         self.logger = logger
         
         # Initialize components
-        self.parser = PDFParser()
+        self.parser = PDFParser(cache_dir=settings.paths["cache"], backend=settings.PDF_BACKEND)
         self.chunker = TokenAwareChunker(
             chunk_size=settings.CHUNK_SIZE,
             chunk_overlap=settings.CHUNK_OVERLAP
@@ -45,13 +50,16 @@ class DocumentIngester:
         self.faiss_store = FAISSStore(openai_client)
         self.sqlite_store = SQLiteStore()
     
-    def ingest_document(self, pdf_path: Path, doc_id: str) -> IngestResponse:
+    def ingest_document(self, pdf_path: Path, doc_id: str, cache_key: Optional[str] = None,
+                        force_refresh: bool = False) -> IngestResponse:
         """
         Ingest a PDF document into the RAG system.
         
         Args:
             pdf_path: Path to the PDF file
             doc_id: Document identifier
+            cache_key: Content hash of the PDF, enabling the parsed-page cache
+            force_refresh: Re-parse the PDF even on a parse cache hit
             
         Returns:
             IngestResponse with processing results
@@ -60,30 +68,7 @@ class DocumentIngester:
         self.logger.info(f"Starting document ingestion for {doc_id}, pdf_path={str(pdf_path)}")
         
         try:
-            # Step 1: Parse PDF
-            parse_start = time.time()
-            pages = self.parser.parse_pdf(pdf_path, doc_id)
-            parse_time = time.time() - parse_start
-            log_timing(self.logger, "pdf_parsing", parse_time, doc_id=doc_id, pages_count=len(pages))
-            
-            if not pages:
-                raise ValueError("No text extracted from PDF")
-            
-            # Step 2: Chunk text
-            chunk_start = time.time()
-            chunks = self.chunker.chunk_pages(pages, doc_id)
-            chunk_time = time.time() - chunk_start
-            log_timing(self.logger, "text_chunking", chunk_time, doc_id=doc_id, chunks_count=len(chunks))
-            
-            if not chunks:
-                raise ValueError("No chunks created from pages")
-            
-            # Validate chunks
-            if not self.chunker.validate_chunks(chunks):
-                raise ValueError("Chunk validation failed")
-            
-            # Step 3: Save chunks snapshot
-            self._save_chunks_snapshot(doc_id, chunks)
+            pages, chunks = self._parse_and_chunk(pdf_path, doc_id, cache_key, force_refresh)
             
             # Step 4: Embed and index in FAISS
             faiss_start = time.time()
@@ -92,28 +77,160 @@ class DocumentIngester:
             log_timing(self.logger, "faiss_indexing", faiss_time, doc_id=doc_id, vectors_count=len(chunks))
             
             # Step 5: Index in SQLite FTS5
-            sqlite_start = time.time()
-            self.sqlite_store.upsert_chunks(doc_id, chunks)
-            sqlite_time = time.time() - sqlite_start
-            log_timing(self.logger, "sqlite_indexing", sqlite_time, doc_id=doc_id, chunks_count=len(chunks))
+            self._index_keywords(doc_id, chunks)
             
-            # Calculate total processing time
-            total_time = time.time() - start_time
+            return self._build_response(doc_id, pages, chunks, start_time)
             
-            self.logger.info(f"Document ingestion completed for {doc_id}, pages_count={len(pages)}, chunks_count={len(chunks)}, total_time={total_time}")
+        except Exception as e:
+            self.logger.error(f"Document ingestion failed for {doc_id}: {str(e)}", exc_info=True)
+            raise
+    
+    async def aingest_document(self, pdf_path: Path, doc_id: str, cache_key: Optional[str] = None,
+                               force_refresh: bool = False) -> IngestResponse:
+        """
+        Ingest a PDF document, sending embedding requests concurrently.
+        
+        Parsing, chunking and keyword indexing run in worker threads; embedding
+        batches go through the async OpenAI client with bounded concurrency,
+        overlapping the keyword indexing.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            doc_id: Document identifier
+            cache_key: Content hash of the PDF, enabling the parsed-page cache
+            force_refresh: Re-parse the PDF even on a parse cache hit
             
-            return IngestResponse(
-                doc_id=doc_id,
-                pages_count=len(pages),
-                chunks_count=len(chunks),
-                processing_time=total_time,
-                message=f"Successfully ingested {len(pages)} pages into {len(chunks)} chunks"
+        Returns:
+            IngestResponse with processing results
+        """
+        start_time = time.time()
+        self.logger.info(f"Starting async document ingestion for {doc_id}, pdf_path={str(pdf_path)}")
+        
+        try:
+            pages, chunks = await asyncio.to_thread(
+                self._parse_and_chunk, pdf_path, doc_id, cache_key, force_refresh
             )
             
+            # Steps 4 and 5 are independent, so the SQLite FTS5 build runs while
+            # embedding requests are in flight
+            await asyncio.gather(
+                self._aindex_vectors(doc_id, chunks),
+                asyncio.to_thread(self._index_keywords, doc_id, chunks)
+            )
+            
+            return self._build_response(doc_id, pages, chunks, start_time)
+            
         except Exception as e:
             self.logger.error(f"Document ingestion failed for {doc_id}: {str(e)}", exc_info=True)
             raise
     
+    async def _aindex_vectors(self, doc_id: str, chunks: List) -> None:
+        """
+        Embed chunks and index them in FAISS.
+        
+        Args:
+            doc_id: Document identifier
+            chunks: List of chunks to index
+        """
+        faiss_start = time.time()
+        if self.async_openai_client is not None:
+            await self.faiss_store.aupsert_chunks(doc_id, chunks, self.async_openai_client)
+        else:
+            # A client's connection pool is bound to the event loop it first ran on,
+            # and each call may run on a new loop, so the client lives for this call only
+            async with AsyncOpenAI(api_key=self.openai_client.api_key) as async_client:
+                await self.faiss_store.aupsert_chunks(doc_id, chunks, async_client)
+        faiss_time = time.time() - faiss_start
+        log_timing(self.logger, "faiss_indexing", faiss_time, doc_id=doc_id, vectors_count=len(chunks))
+    
+    def _parse_and_chunk(self, pdf_path: Path, doc_id: str, cache_key: Optional[str],
+                         force_refresh: bool) -> Tuple[List, List]:
+        """
+        Parse a PDF, chunk its pages and save the chunks snapshot.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            doc_id: Document identifier
+            cache_key: Content hash of the PDF, enabling the parsed-page cache
+            force_refresh: Re-parse the PDF even on a parse cache hit
+            
+        Returns:
+            Tuple of (pages, chunks)
+            
+        Raises:
+            ValueError: If no text or no valid chunks come out of the PDF
+        """
+        # Step 1: Parse PDF
+        parse_start = time.time()
+        pages = self.parser.parse_pdf(
+            pdf_path, doc_id,
+            cache_key=cache_key,
+            force_refresh=force_refresh,
+            max_pages=settings.MAX_PAGES_PER_DOC
+        )
+        parse_time = time.time() - parse_start
+        log_timing(self.logger, "pdf_parsing", parse_time, doc_id=doc_id, pages_count=len(pages))
+        
+        if not pages:
+            raise ValueError("No text extracted from PDF")
+        
+        # Step 2: Chunk text
+        chunk_start = time.time()
+        chunks = self.chunker.chunk_pages(pages, doc_id)
+        chunk_time = time.time() - chunk_start
+        log_timing(self.logger, "text_chunking", chunk_time, doc_id=doc_id, chunks_count=len(chunks))
+        
+        if not chunks:
+            raise ValueError("No chunks created from pages")
+        
+        # Validate chunks
+        if not self.chunker.validate_chunks(chunks):
+            raise ValueError("Chunk validation failed")
+        
+        # Step 3: Save chunks snapshot
+        self._save_chunks_snapshot(doc_id, chunks)
+        
+        return pages, chunks
+    
+    def _index_keywords(self, doc_id: str, chunks: List) -> None:
+        """
+        Index chunks in SQLite FTS5.
+        
+        Args:
+            doc_id: Document identifier
+            chunks: List of chunks to index
+        """
+        sqlite_start = time.time()
+        self.sqlite_store.upsert_chunks(doc_id, chunks)
+        sqlite_time = time.time() - sqlite_start
+        log_timing(self.logger, "sqlite_indexing", sqlite_time, doc_id=doc_id, chunks_count=len(chunks))
+    
+    def _build_response(self, doc_id: str, pages: List, chunks: List, start_time: float) -> IngestResponse:
+        """
+        Log completion and build the ingestion response.
+        
+        Args:
+            doc_id: Document identifier
+            pages: Parsed pages
+            chunks: Indexed chunks
+            start_time: Time ingestion started
+            
+        Returns:
+            IngestResponse with processing results
+        """
+        # Calculate total processing time
+        total_time = time.time() - start_time
+        
+        self.logger.info(f"Document ingestion completed for {doc_id}, pages_count={len(pages)}, chunks_count={len(chunks)}, total_time={total_time}")
+        
+        return IngestResponse(
+            doc_id=doc_id,
+            pages_count=len(pages),
+            chunks_count=len(chunks),
+            processing_time=total_time,
+            message=f"Successfully ingested {len(pages)} pages into {len(chunks)} chunks"
+        )
+    
     def _save_chunks_snapshot(self, doc_id: str, chunks: List) -> None:
         """
         Save chunks to a Parquet file for debugging.
@@ -123,21 +240,8 @@ class DocumentIngester:
             chunks: List of chunks to save
         """
         try:
-            # Convert chunks to DataFrame
-            chunk_data = []
-            for chunk in chunks:
-                chunk_data.append({
-                    "doc_id": chunk.doc_id,
-                    "page": chunk.page,
-                    "section": chunk.section,
-                    "chunk_id": chunk.chunk_id,
-                    "text": chunk.text,
-                    "char_start": chunk.char_start,
-                    "char_end": chunk.char_end,
-                    "token_count": chunk.token_count
-                })
-            
-            df = pd.DataFrame(chunk_data)
+            # Build the DataFrame straight from columns
+            df = pd.DataFrame(ChunkBatch.from_chunks(doc_id, chunks).to_columns())
             
             # Save to Parquet
             chunks_file = settings.paths["chunks"] / f"{doc_id}.parquet"
@@ -2,10 +2,15 @@
 Pydantic models for request/response validation.
 """
 
+import re
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel, Field, validator
 
 
+# Valid document identifiers: letters, digits, underscores and hyphens
+DOC_ID_PATTERN = re.compile(r"[A-Za-z0-9_\-]+")
+
+
 class IngestRequest(BaseModel):
     """Request model for document ingestion."""
     doc_id: str = Field(..., description="Unique document identifier")
@@ -13,8 +18,7 @@ class IngestRequest(BaseModel):
     @validator("doc_id")
     def validate_doc_id(cls, v):
         """Validate doc_id format."""
-        import re
-        if not re.match(r'^[a-zA-Z0-9_\-]+$', v):
+        if not DOC_ID_PATTERN.fullmatch(v):
             raise ValueError("doc_id must contain only alphanumeric characters, underscores, and hyphens")
         return v
 
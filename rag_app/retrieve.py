@@ -3,10 +3,13 @@ Hybrid retrieval implementation with Reciprocal Rank Fusion (RRF) and reranking.
 Combines vector search (FAISS) and keyword search (SQLite FTS5) for better results.
 """
 
+import asyncio
+import base64
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional, Tuple
-from collections import defaultdict
 from functools import lru_cache
+from pathlib import Path
 
 import numpy as np
 from sentence_transformers import CrossEncoder
@@ -19,9 +22,65 @@ from store.sqlite_store import SQLiteStore
 
 logger = logging.getLogger(__name__)
 
+class OnnxReranker:
+    """Cross-encoder reranker backed by an ONNX Runtime session (e.g. an INT8-quantized bge-reranker export)."""
+    
+    def __init__(self, model_dir: str):
+        """
+        Load the ONNX model and its tokenizer.
+        
+        Args:
+            model_dir: Directory containing model.onnx and the exported tokenizer files
+        """
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            str(Path(model_dir) / "model.onnx"), options, providers=["CPUExecutionProvider"]
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+    
+    def predict(self, pairs: List[List[str]], batch_size: Optional[int] = None) -> np.ndarray:
+        """
+        Score query-document pairs in a single forward pass.
+        
+        Args:
+            pairs: List of [query, document] pairs
+            batch_size: Ignored, all pairs are scored together (kept for CrossEncoder compatibility)
+            
+        Returns:
+            Raw relevance logits, one per pair
+        """
+        queries, documents = zip(*pairs)
+        encoded = self.tokenizer(
+            list(queries), list(documents), padding="longest", truncation=True,
+            max_length=512, return_tensors="np"
+        )
+        inputs = {name: value.astype(np.int64) for name, value in encoded.items() if name in self.input_names}
+        logits = self.session.run(None, inputs)[0]
+        return logits.reshape(-1)
+
+
+@lru_cache(maxsize=1)
+def get_search_pool() -> ThreadPoolExecutor:
+    """Get the thread pool that runs keyword searches alongside query embedding."""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="fts-search")
+
+
 @lru_cache(maxsize=1)
 def get_reranker():
+    """Load the reranker once per process; every HybridRetriever shares this instance."""
     log = logging.getLogger(__name__)
+    if settings.RERANKER_ONNX_PATH:
+        try:
+            model = OnnxReranker(settings.RERANKER_ONNX_PATH)
+            log.info(f"Loaded ONNX reranker from {settings.RERANKER_ONNX_PATH}")
+            return model
+        except Exception as e:
+            log.warning(f"Failed to load ONNX reranker, falling back to CrossEncoder: {str(e)}")
     log.info("Loading bge-reranker-base...")
     model = CrossEncoder("BAAI/bge-reranker-base")
     log.info("Loaded reranker")
@@ -52,6 +111,11 @@ class HybridRetriever:
         self.rerank_top_n = settings.RERANK_TOP_N
         self.confidence_threshold = settings.CONFIDENCE_THRESHOLD
     
+    @property
+    def reranker(self):
+        """Process-wide reranker, loaded on first use."""
+        return get_reranker()
+    
     def retrieve(self, doc_id: str, question: str, k: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Perform hybrid retrieval with reranking.
@@ -70,32 +134,93 @@ class HybridRetriever:
         self.logger.info(f"Starting hybrid retrieval for {doc_id}, question={question}")
         
         try:
+            # Keyword search (SQLite FTS5) only needs the question, so it runs
+            # in the background while the query embedding is fetched
+            fts_future = get_search_pool().submit(self.sqlite_store.bm25_search, doc_id, question, self.fts_k)
+            
             # Step 1: Generate query embedding
             query_embedding = self._generate_query_embedding(question)
             
             # Step 2: Vector search (FAISS)
             faiss_results = self.faiss_store.search(doc_id, query_embedding, self.faiss_k)
             
-            # Step 3: Keyword search (SQLite FTS5)
-            fts_results = self.sqlite_store.bm25_search(doc_id, question, self.fts_k)
-            
-            # Step 4: Reciprocal Rank Fusion
-            rrf_results = self._reciprocal_rank_fusion(faiss_results, fts_results)
+            # Step 3: Collect keyword search results
+            fts_results = fts_future.result()
             
-            # Step 5: Rerank top candidates
-            reranked_results = self._rerank_candidates(question, rrf_results[:self.rerank_candidates])
+            return self._fuse_and_rerank(doc_id, question, faiss_results, fts_results, k)
             
-            # Step 6: Apply confidence threshold
-            final_results = self._apply_confidence_threshold(reranked_results[:k])
+        except Exception as e:
+            self.logger.error(f"Failed hybrid retrieval for {doc_id}: {str(e)}", exc_info=True)
+            return []
+    
+    async def aretrieve(self, doc_id: str, question: str, k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Perform hybrid retrieval with reranking, querying both stores concurrently.
+        
+        Blocking work runs in worker threads, so the FTS5 search overlaps the
+        query embedding and FAISS search, and the event loop stays free.
+        
+        Args:
+            doc_id: Document identifier
+            question: Query question
+            k: Number of final results to return (overrides config)
             
-            self.logger.info(f"Hybrid retrieval completed for {doc_id}, faiss_results={len(faiss_results)}, fts_results={len(fts_results)}, rrf_results={len(rrf_results)}, final_results={len(final_results)}")
+        Returns:
+            List of retrieved and reranked results
+        """
+        if k is None:
+            k = self.rerank_top_n
+        
+        self.logger.info(f"Starting hybrid retrieval for {doc_id}, question={question}")
+        
+        try:
+            # Embedding + vector search (FAISS) alongside keyword search (SQLite FTS5)
+            faiss_results, fts_results = await asyncio.gather(
+                self._avector_search(doc_id, question),
+                self.sqlite_store.abm25_search(doc_id, question, self.fts_k)
+            )
             
-            return final_results
+            return await asyncio.to_thread(
+                self._fuse_and_rerank, doc_id, question, faiss_results, fts_results, k
+            )
             
         except Exception as e:
             self.logger.error(f"Failed hybrid retrieval for {doc_id}: {str(e)}", exc_info=True)
             return []
     
+    async def _avector_search(self, doc_id: str, question: str) -> List[Dict[str, Any]]:
+        """Embed the question and search the FAISS index without blocking the event loop."""
+        query_embedding = await asyncio.to_thread(self._generate_query_embedding, question)
+        return await self.faiss_store.asearch(doc_id, query_embedding, self.faiss_k)
+    
+    def _fuse_and_rerank(self, doc_id: str, question: str, faiss_results: List[Dict],
+                         fts_results: List[Dict], k: int) -> List[Dict[str, Any]]:
+        """
+        Fuse search results, rerank them and apply the confidence threshold.
+        
+        Args:
+            doc_id: Document identifier
+            question: Query question
+            faiss_results: Results from FAISS vector search
+            fts_results: Results from SQLite FTS5 search
+            k: Number of final results to return
+            
+        Returns:
+            List of retrieved and reranked results
+        """
+        # Step 4: Reciprocal Rank Fusion
+        rrf_results = self._reciprocal_rank_fusion(faiss_results, fts_results, top_n=self.rerank_candidates)
+        
+        # Step 5: Rerank top candidates
+        reranked_results = self._rerank_candidates(question, rrf_results)
+        
+        # Step 6: Apply confidence threshold
+        final_results = self._apply_confidence_threshold(reranked_results[:k])
+        
+        self.logger.info(f"Hybrid retrieval completed for {doc_id}, faiss_results={len(faiss_results)}, fts_results={len(fts_results)}, rrf_results={len(rrf_results)}, final_results={len(final_results)}")
+        
+        return final_results
+    
     def _generate_query_embedding(self, question: str) -> np.ndarray:
         """
         Generate embedding for the query.
@@ -107,19 +232,23 @@ class HybridRetriever:
             Query embedding vector
         """
         try:
+            # base64 returns the raw float32 bytes, avoiding a Python list of floats
             response = self.openai_client.embeddings.create(
                 model=settings.OPENAI_EMBEDDING_MODEL,
-                input=question
+                input=question,
+                encoding_format="base64"
             )
             
-            embedding = np.array(response.data[0].embedding, dtype='float32')
+            raw = base64.b64decode(response.data[0].embedding)
+            embedding = np.frombuffer(raw, dtype=np.float32).copy()
             return embedding
             
         except Exception as e:
             self.logger.error(f"Failed to generate query embedding: {str(e)}", exc_info=True)
             raise
     
-    def _reciprocal_rank_fusion(self, faiss_results: List[Dict], fts_results: List[Dict], k: int = 60) -> List[Dict[str, Any]]:
+    def _reciprocal_rank_fusion(self, faiss_results: List[Dict], fts_results: List[Dict], k: int = 60,
+                                top_n: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Combine results using Reciprocal Rank Fusion (RRF).
         
@@ -127,45 +256,55 @@ class HybridRetriever:
             faiss_results: Results from FAISS vector search
             fts_results: Results from SQLite FTS5 search
             k: RRF parameter (higher = more dampening)
+            top_n: Only return this many of the best results (all if None)
             
         Returns:
             Combined and ranked results
         """
-        # Create a mapping of chunk_id to combined score
-        combined_scores = defaultdict(float)
-        result_map = {}
+        # Single pass over both ranked lists, accumulating into one entry per chunk_id
+        fused = {}
         
-        # Process FAISS results
         for rank, result in enumerate(faiss_results):
-            chunk_id = result["chunk_id"]
             rrf_score = 1.0 / (k + rank + 1)
-            combined_scores[chunk_id] += rrf_score
-            result_map[chunk_id] = result.copy()
-            result_map[chunk_id]["faiss_rank"] = rank
-            result_map[chunk_id]["faiss_rrf_score"] = rrf_score
+            fused[result["chunk_id"]] = {
+                **result,
+                "faiss_rank": rank,
+                "faiss_rrf_score": rrf_score,
+                "rrf_score": rrf_score
+            }
         
-        # Process FTS results
         for rank, result in enumerate(fts_results):
-            chunk_id = result["chunk_id"]
             rrf_score = 1.0 / (k + rank + 1)
-            combined_scores[chunk_id] += rrf_score
-            if chunk_id in result_map:
-                result_map[chunk_id]["fts_rank"] = rank
-                result_map[chunk_id]["fts_rrf_score"] = rrf_score
-                result_map[chunk_id]["bm25_score"] = result["bm25_score"]
+            entry = fused.get(result["chunk_id"])
+            if entry is None:
+                fused[result["chunk_id"]] = {
+                    **result,
+                    "fts_rank": rank,
+                    "fts_rrf_score": rrf_score,
+                    "faiss_rank": None,
+                    "faiss_rrf_score": 0.0,
+                    "rrf_score": rrf_score
+                }
             else:
-                result_map[chunk_id] = result.copy()
-                result_map[chunk_id]["fts_rank"] = rank
-                result_map[chunk_id]["fts_rrf_score"] = rrf_score
-                result_map[chunk_id]["faiss_rank"] = None
-                result_map[chunk_id]["faiss_rrf_score"] = 0.0
-        
-        # Sort by combined RRF score
-        sorted_results = []
-        for chunk_id, score in sorted(combined_scores.items(), key=lambda x: x[1], reverse=True):
-            result = result_map[chunk_id]
-            result["rrf_score"] = score
-            sorted_results.append(result)
+                entry["fts_rank"] = rank
+                entry["fts_rrf_score"] = rrf_score
+                entry["bm25_score"] = result["bm25_score"]
+                entry["rrf_score"] += rrf_score
+        
+        # Keep everything scoring at least the top_n-th best score, so hits tied at
+        # the cutoff all compete, then order only those; ties keep insertion order
+        # (FAISS hits first)
+        results = list(fused.values())
+        scores = np.fromiter((result["rrf_score"] for result in results), dtype=np.float64, count=len(results))
+        top = np.arange(len(results))
+        if top_n is not None and top_n < len(results):
+            if top_n > 0:
+                cutoff = np.partition(scores, len(results) - top_n)[len(results) - top_n]
+                top = np.flatnonzero(scores >= cutoff)
+            else:
+                top = top[:0]
+        top = top[np.argsort(-scores[top], kind="stable")][:top_n]
+        sorted_results = [results[i] for i in top.tolist()]
         
         self.logger.info(f"RRF completed, faiss_results={len(faiss_results)}, fts_results={len(fts_results)}, combined_results={len(sorted_results)}")
         
@@ -186,39 +325,35 @@ class HybridRetriever:
             return []
         
         try:
-            # Get reranker (lazy loaded)
-            reranker = get_reranker()
+            # Get reranker (lazy loaded, shared across retrievers)
+            reranker = self.reranker
             
             # Prepare query-document pairs for reranking
             pairs = []
             for candidate in candidates:
                 pairs.append([question, candidate["text"]])
             
-            # Get reranking scores
-            rerank_scores = reranker.predict(pairs)
+            # Score all pairs in one batch
+            rerank_scores = reranker.predict(pairs, batch_size=len(pairs))
             
-            # Improved confidence scoring using sigmoid normalization
+            # Improved confidence scoring using sigmoid normalization (scale 2.0)
             # This preserves the relative differences better than min-max normalization
-            import math
+            rerank_scores = np.asarray(rerank_scores, dtype=np.float64).reshape(-1)
+            normalized_scores = 1.0 / (1.0 + np.exp(-2.0 * rerank_scores))
             
-            # Apply sigmoid normalization to get better confidence distribution
-            def sigmoid_normalize(score, scale=2.0):
-                return 1 / (1 + math.exp(-scale * score))
+            # Combined score considers both RRF and rerank scores
+            rrf_scores = np.fromiter((c.get("rrf_score", 0.0) for c in candidates), dtype=np.float64, count=len(candidates))
+            combined_scores = 0.7 * normalized_scores + 0.3 * rrf_scores
             
-            normalized_scores = [sigmoid_normalize(score) for score in rerank_scores]
-            
-            # Add scores to candidates and sort
-            for i, candidate in enumerate(candidates):
-                candidate["rerank_score"] = float(rerank_scores[i])
-                candidate["confidence"] = float(normalized_scores[i])
-                
-                # Add combined score that considers both RRF and rerank scores
-                rrf_score = candidate.get("rrf_score", 0.0)
-                combined_score = 0.7 * normalized_scores[i] + 0.3 * rrf_score
+            for candidate, rerank_score, confidence, combined_score in zip(
+                candidates, rerank_scores.tolist(), normalized_scores.tolist(), combined_scores.tolist()
+            ):
+                candidate["rerank_score"] = rerank_score
+                candidate["confidence"] = confidence
                 candidate["combined_score"] = combined_score
             
             # Sort by combined score (descending) for better ranking
-            reranked = sorted(candidates, key=lambda x: x["combined_score"], reverse=True)
+            reranked = [candidates[i] for i in np.argsort(-combined_scores, kind="stable").tolist()]
             
             top_score = reranked[0]["rerank_score"] if reranked else 0
             top_confidence = reranked[0]["confidence"] if reranked else 0
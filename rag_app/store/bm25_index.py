@@ -0,0 +1,206 @@
+"""
+Precomputed BM25 index for keyword search.
+Scores every (term, chunk) pair at ingest so queries reduce to summing a few sparse rows.
+"""
+
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Same token boundaries as the FTS5 unicode61 tokenizer: runs of word characters
+BM25_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase terms."""
+    return BM25_TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    BM25 scores stored as a term-by-chunk CSR matrix.
+    
+    Row t holds the BM25 contribution of term t to every chunk containing it,
+    so a query's scores are the sum of its terms' rows.
+    """
+    
+    def __init__(self, terms: np.ndarray, indptr: np.ndarray, indices: np.ndarray,
+                 data: np.ndarray, row_ids: np.ndarray, build_id: Optional[int] = None):
+        """
+        Initialize the index from its CSR arrays.
+        
+        Args:
+            terms: Vocabulary, one term per matrix row
+            indptr: CSR row pointers, len(terms) + 1 entries
+            indices: Chunk position of every stored score
+            data: BM25 score of every stored (term, chunk) pair
+            row_ids: SQLite row id of the chunk at each position
+            build_id: Identifier of the database build the row ids refer to
+        """
+        self.terms = terms
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.row_ids = row_ids
+        self.build_id = build_id
+        self.vocab = {term: i for i, term in enumerate(terms.tolist())}
+    
+    @classmethod
+    def build(cls, row_ids: List[int], texts: List[str], k1: float = 1.2, b: float = 0.75,
+              build_id: Optional[int] = None) -> "BM25Index":
+        """
+        Score every term of every chunk.
+        
+        Args:
+            row_ids: SQLite row id of each chunk
+            texts: Chunk texts, aligned with row_ids
+            k1: Term frequency saturation
+            b: Document length normalization
+            build_id: Identifier of the database build the row ids refer to
+        
+        Returns:
+            BM25Index over the chunks
+        """
+        vocab = {}
+        term_ids, positions, freqs = [], [], []
+        doc_lengths = np.zeros(len(texts), dtype=np.float32)
+        
+        for position, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            doc_lengths[position] = sum(counts.values())
+            for term, count in counts.items():
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                positions.append(position)
+                freqs.append(count)
+        
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        positions = np.asarray(positions, dtype=np.int32)
+        freqs = np.asarray(freqs, dtype=np.float32)
+        
+        # Lucene-style idf, always positive
+        num_docs = len(texts)
+        doc_freqs = np.bincount(term_ids, minlength=len(vocab)).astype(np.float32)
+        idf = np.log1p((num_docs - doc_freqs + 0.5) / (doc_freqs + 0.5))
+        
+        avg_length = doc_lengths.mean() if num_docs else 1.0
+        norm = k1 * (1.0 - b + b * doc_lengths[positions] / max(avg_length, 1.0))
+        scores = idf[term_ids] * freqs * (k1 + 1.0) / (freqs + norm)
+        
+        # Renumber terms alphabetically so prefixes map to contiguous row ranges
+        terms = np.array(list(vocab), dtype=str)
+        term_order = np.argsort(terms)
+        rank = np.empty_like(term_order)
+        rank[term_order] = np.arange(len(term_order))
+        term_ids = rank[term_ids]
+        
+        # Group entries by term to form CSR rows
+        order = np.argsort(term_ids, kind="stable")
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(doc_freqs[term_order].astype(np.int64), out=indptr[1:])
+        
+        return cls(
+            terms=terms[term_order],
+            indptr=indptr,
+            indices=positions[order],
+            data=scores[order].astype(np.float32),
+            row_ids=np.asarray(row_ids, dtype=np.int64),
+            build_id=build_id
+        )
+    
+    def search(self, query: str, k: int, prefix_min_length: int = 0,
+               require_all: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the chunks with the highest BM25 score for a query.
+        
+        Args:
+            query: Search query
+            k: Number of results to return
+            prefix_min_length: Query terms at least this long also match every
+                indexed term they prefix ("borrow" matches "borrower"); 0 disables
+            require_all: Only return chunks matching every query term
+        
+        Returns:
+            Tuple of (row_ids, scores) for matching chunks, best first
+        """
+        # Matrix rows matched by each distinct query term
+        term_rows = []
+        for term in dict.fromkeys(tokenize(query)):
+            if prefix_min_length and len(term) >= prefix_min_length:
+                start = np.searchsorted(self.terms, term, side="left")
+                end = np.searchsorted(self.terms, term + "\U0010ffff", side="left")
+                term_rows.append(range(start, end))
+            elif term in self.vocab:
+                term_rows.append([self.vocab[term]])
+            else:
+                term_rows.append([])
+        
+        rows = set().union(*term_rows)
+        if not rows or (require_all and not all(term_rows)):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        
+        scores = np.zeros(len(self.row_ids), dtype=np.float32)
+        for row in rows:
+            start, end = self.indptr[row], self.indptr[row + 1]
+            scores[self.indices[start:end]] += self.data[start:end]
+        
+        if require_all:
+            # Count, per chunk, the query terms with at least one matching row
+            term_hits = np.zeros(len(self.row_ids), dtype=np.int32)
+            for matched_rows in term_rows:
+                has_term = np.zeros(len(self.row_ids), dtype=bool)
+                for row in matched_rows:
+                    has_term[self.indices[self.indptr[row]:self.indptr[row + 1]]] = True
+                term_hits += has_term
+            matched = np.flatnonzero(term_hits == len(term_rows))
+        else:
+            matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(scores[matched], -k)[-k:]]
+        matched = matched[np.argsort(-scores[matched], kind="stable")]
+        
+        return self.row_ids[matched], scores[matched]
+    
+    def save(self, path: Path) -> None:
+        """
+        Save the index atomically, so concurrent readers never see a partial file.
+        
+        Args:
+            path: Destination .npz path
+        """
+        tmp_path = path.with_name(path.stem + ".tmp.npz")
+        arrays = {
+            "terms": self.terms,
+            "indptr": self.indptr,
+            "indices": self.indices,
+            "data": self.data,
+            "row_ids": self.row_ids
+        }
+        if self.build_id is not None:
+            arrays["build_id"] = np.int64(self.build_id)
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+    
+    @classmethod
+    def load(cls, path: Path) -> "BM25Index":
+        """
+        Load a saved index.
+        
+        Args:
+            path: Path to the .npz file
+        
+        Returns:
+            BM25Index
+        """
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls(
+                terms=arrays["terms"],
+                indptr=arrays["indptr"],
+                indices=arrays["indices"],
+                data=arrays["data"],
+                row_ids=arrays["row_ids"],
+                build_id=int(arrays["build_id"]) if "build_id" in arrays else None
+            )
@@ -3,21 +3,71 @@ FAISS vector store implementation for document embeddings.
 Handles creation, loading, saving, and searching of vector indices.
 """
 
-import json
+import asyncio
+import base64
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
 
 import faiss
 import numpy as np
-from openai import OpenAI
+import orjson
+from openai import AsyncOpenAI, OpenAI, RateLimitError
 
 from config import settings
+from store.semantic_cache import get_semantic_cache
 from utils.chunking import Chunk
+from utils.vectors import normalize_embeddings
 
 
 logger = logging.getLogger(__name__)
 
+# Number of row tiles (and threads) used by tiled search
+SEARCH_TILES = os.cpu_count() or 1
+
+# Stored float16 rows upcast to float32 at a time within a search tile
+TILE_BLOCK_ROWS = 4096
+
+# Leading bytes of FAISS index files holding a flat inner-product index, the only
+# kind whose ranking tiled search over the stored embeddings reproduces
+FLAT_IP_INDEX_FOURCC = b"IxFI"
+
+# Memory-map index files on load so vectors live in the shared page cache;
+# IO_FLAG_MMAP_IFC extends this to flat indices in newer FAISS releases
+INDEX_READ_FLAGS = faiss.IO_FLAG_MMAP | getattr(faiss, "IO_FLAG_MMAP_IFC", 0) | faiss.IO_FLAG_READ_ONLY
+
+
+# Chunks and tokens per embeddings request, under the API's per-request limits
+EMBEDDING_BATCH_SIZE = 256
+EMBEDDING_BATCH_MAX_TOKENS = 250_000
+
+# Embedding requests in flight at once during async ingestion
+EMBEDDING_CONCURRENCY = 10
+
+# Retries of a rate-limited embedding request, with exponential backoff
+EMBEDDING_MAX_RETRIES = 3
+
+
+@lru_cache(maxsize=1)
+def get_tile_pool() -> ThreadPoolExecutor:
+    """Get the thread pool used for tiled brute-force search."""
+    return ThreadPoolExecutor(max_workers=SEARCH_TILES, thread_name_prefix="faiss-tile")
+
+
+@lru_cache(maxsize=1)
+def get_gpu_resources():
+    """Get the FAISS GPU resources shared by all GPU-resident indices."""
+    return faiss.StandardGpuResources()
+
+
+def gpu_available() -> bool:
+    """Check whether FAISS was built with GPU support and a CUDA device is visible."""
+    get_num_gpus = getattr(faiss, "get_num_gpus", None)
+    return get_num_gpus is not None and get_num_gpus() > 0
+
 
 class FAISSStore:
     """FAISS vector store for document embeddings."""
@@ -33,6 +83,11 @@ class FAISSStore:
         self.logger = logger
         self.embedding_model = settings.OPENAI_EMBEDDING_MODEL
         self.embedding_dim = 1536  # text-embedding-3-small dimension
+        self.semantic_cache = get_semantic_cache()
+        
+        # GPU-resident copies of large indices, keyed by doc_id with the source file mtime
+        self.use_gpu = settings.FAISS_USE_GPU and gpu_available()
+        self._gpu_cache: Dict[str, Tuple[float, faiss.Index]] = {}
         
         # Ensure indices directory exists
         settings.paths["indices"].mkdir(parents=True, exist_ok=True)
@@ -69,8 +124,21 @@ class FAISSStore:
             return None
         
         try:
-            index = faiss.read_index(str(index_path))
+            index_mtime = index_path.stat().st_mtime
+            
+            # Reuse the GPU copy while the index file is unchanged
+            gpu_entry = self._gpu_cache.get(doc_id)
+            if gpu_entry is not None and gpu_entry[0] == index_mtime:
+                return gpu_entry[1]
+            
+            index = faiss.read_index(str(index_path), INDEX_READ_FLAGS)
             self.logger.info(f"Loaded FAISS index for {doc_id}, vectors_count={index.ntotal}")
+            
+            if self.use_gpu and index.ntotal > settings.FAISS_GPU_MIN_VECTORS:
+                index = faiss.index_cpu_to_gpu(get_gpu_resources(), 0, index)
+                self._gpu_cache[doc_id] = (index_mtime, index)
+                self.logger.info(f"Moved FAISS index for {doc_id} to GPU, vectors_count={index.ntotal}")
+            
             return index
         except Exception as e:
             self.logger.error(f"Failed to load FAISS index for {doc_id}: {str(e)}", exc_info=True)
@@ -89,12 +157,21 @@ class FAISSStore:
         meta_path = self._get_meta_path(doc_id)
         
         try:
-            # Save FAISS index
-            faiss.write_index(index, str(index_path))
+            # Cached search results and GPU copies are stale once the index is replaced
+            self.semantic_cache.invalidate(doc_id)
+            self._gpu_cache.pop(doc_id, None)
             
-            # Save metadata
-            with open(meta_path, 'w') as f:
-                json.dump(metadata, f, indent=2)
+            # Save FAISS index and metadata. Files are replaced atomically, never
+            # rewritten in place, since other readers may have the old index
+            # memory-mapped or be reading the metadata. Both are written in full
+            # before either is swapped in, keeping the window where a reader can
+            # pair a new index with old metadata to two renames.
+            tmp_index_path = index_path.with_name(index_path.name + ".tmp")
+            tmp_meta_path = meta_path.with_name(meta_path.name + ".tmp")
+            faiss.write_index(index, str(tmp_index_path))
+            tmp_meta_path.write_bytes(orjson.dumps(metadata, option=orjson.OPT_INDENT_2))
+            os.replace(tmp_index_path, index_path)
+            os.replace(tmp_meta_path, meta_path)
             
             index_size_mb = index_path.stat().st_size / (1024 * 1024)
             self.logger.info(f"Saved FAISS index for {doc_id}, vectors_count={index.ntotal}, index_size_mb={index_size_mb}")
@@ -118,42 +195,118 @@ class FAISSStore:
         self.logger.info(f"Starting FAISS upsert for {doc_id}, chunks_count={len(chunks)}")
         
         try:
-            # Generate embeddings for all chunks
+            # Generate normalized embeddings for all chunks
             embeddings = self._generate_embeddings(chunks)
+            self._store_embeddings(doc_id, chunks, embeddings)
             
-            # Create new index
-            index = self.create_index(doc_id)
-            
-            # Normalize embeddings for cosine similarity
-            embeddings = embeddings.astype('float32')
-            faiss.normalize_L2(embeddings)
-            
-            # Add vectors to index
-            index.add(embeddings)
-            
-            # Create metadata mapping
-            metadata = {}
-            for i, chunk in enumerate(chunks):
-                metadata[str(i)] = {
-                    "chunk_id": chunk.chunk_id,
-                    "doc_id": chunk.doc_id,
-                    "page": chunk.page,
-                    "section": chunk.section,
-                    "char_start": chunk.char_start,
-                    "char_end": chunk.char_end,
-                    "text": chunk.text,
-                    "token_count": chunk.token_count
-                }
-            
-            # Save index and metadata
-            self.save_index(doc_id, index, metadata)
-            
-            self.logger.info(f"FAISS upsert completed for {doc_id}, vectors_count={len(chunks)}")
+        except Exception as e:
+            self.logger.error(f"Failed to upsert chunks for {doc_id}: {str(e)}", exc_info=True)
+            raise
+    
+    async def aupsert_chunks(self, doc_id: str, chunks: List[Chunk], async_client: AsyncOpenAI) -> None:
+        """
+        Upsert chunks into the FAISS index, embedding batches concurrently.
+        
+        Args:
+            doc_id: Document identifier
+            chunks: List of chunks to embed and store
+            async_client: Async OpenAI client for embeddings
+        """
+        if not chunks:
+            self.logger.warning(f"No chunks provided for {doc_id}")
+            return
+        
+        self.logger.info(f"Starting async FAISS upsert for {doc_id}, chunks_count={len(chunks)}")
+        
+        try:
+            embeddings = await self._agenerate_embeddings(chunks, async_client)
+            await asyncio.to_thread(self._store_embeddings, doc_id, chunks, embeddings)
             
         except Exception as e:
             self.logger.error(f"Failed to upsert chunks for {doc_id}: {str(e)}", exc_info=True)
             raise
     
+    def _store_embeddings(self, doc_id: str, chunks: List[Chunk], embeddings: np.ndarray) -> None:
+        """
+        Build and save a document's index from its chunk embeddings.
+        
+        Args:
+            doc_id: Document identifier
+            chunks: Chunks of the document
+            embeddings: Normalized embeddings, aligned with chunks
+        """
+        # Keep the embeddings so the index can be rebuilt without re-embedding; large
+        # documents are also tile-searched over this file, so replace it atomically
+        embeddings_path = self._get_embeddings_path(doc_id)
+        tmp_embeddings_path = embeddings_path.with_name(embeddings_path.name + ".tmp")
+        with open(tmp_embeddings_path, 'wb') as f:
+            np.save(f, embeddings.astype(np.float16))
+        os.replace(tmp_embeddings_path, embeddings_path)
+        
+        # Create new index
+        index = self.create_index(doc_id)
+        
+        # Add vectors to index
+        index.add(embeddings)
+        
+        # Create metadata mapping
+        metadata = {}
+        for i, chunk in enumerate(chunks):
+            metadata[str(i)] = {
+                "chunk_id": chunk.chunk_id,
+                "doc_id": chunk.doc_id,
+                "page": chunk.page,
+                "section": chunk.section,
+                "char_start": chunk.char_start,
+                "char_end": chunk.char_end,
+                "text": chunk.text,
+                "token_count": chunk.token_count
+            }
+        
+        # Save index and metadata
+        self.save_index(doc_id, index, metadata)
+        
+        self.logger.info(f"FAISS upsert completed for {doc_id}, vectors_count={len(chunks)}")
+    
+    def rebuild_index(self, doc_id: str, kind: str = "flat") -> None:
+        """
+        Rebuild a document's FAISS index from its stored embeddings.
+        
+        Args:
+            doc_id: Document identifier
+            kind: Index type, one of "flat", "hnsw" or "sq8"
+            
+        Raises:
+            FileNotFoundError: If no stored embeddings exist for the document
+            ValueError: If the index type is unknown
+        """
+        embeddings_path = self._get_embeddings_path(doc_id)
+        if not embeddings_path.exists():
+            raise FileNotFoundError(f"No stored embeddings for {doc_id}: {embeddings_path}")
+        
+        metadata = self._load_metadata(doc_id)
+        
+        # Upcast from float16 only for building the index
+        embeddings = np.load(embeddings_path).astype(np.float32)
+        normalize_embeddings(embeddings)
+        
+        if kind == "flat":
+            index = self.create_index(doc_id)
+        elif kind == "hnsw":
+            index = faiss.IndexHNSWFlat(self.embedding_dim, 32, faiss.METRIC_INNER_PRODUCT)
+        elif kind == "sq8":
+            index = faiss.IndexScalarQuantizer(
+                self.embedding_dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+            )
+            index.train(embeddings)
+        else:
+            raise ValueError(f"Unknown index kind: {kind}")
+        
+        index.add(embeddings)
+        self.save_index(doc_id, index, metadata)
+        
+        self.logger.info(f"Rebuilt FAISS index for {doc_id}, kind={kind}, vectors_count={index.ntotal}")
+    
     def search(self, doc_id: str, query_embedding: np.ndarray, k: int = 20) -> List[Dict[str, Any]]:
         """
         Search for similar chunks in the FAISS index.
@@ -166,9 +319,23 @@ class FAISSStore:
         Returns:
             List of search results with metadata
         """
-        # Load index and metadata
-        index = self.load_index(doc_id)
-        if index is None:
+        # Normalize query embedding
+        query_embedding = query_embedding.reshape(1, -1).astype('float32')
+        faiss.normalize_L2(query_embedding)
+        
+        # Serve repeated and near-duplicate queries from the semantic cache
+        index_path = self._get_index_path(doc_id)
+        index_mtime = index_path.stat().st_mtime if index_path.exists() else None
+        if index_mtime is not None:
+            cached_results = self.semantic_cache.lookup(doc_id, query_embedding, k, index_mtime)
+            if cached_results is not None:
+                return cached_results
+        
+        # Large flat-indexed documents are searched over the memory-mapped stored
+        # embeddings (or on the GPU), otherwise load the index
+        vectors = None if self.use_gpu else self._load_vectors(doc_id)
+        index = self.load_index(doc_id) if vectors is None else None
+        if vectors is None and index is None:
             self.logger.warning(f"No FAISS index found for {doc_id}")
             return []
         
@@ -178,25 +345,16 @@ class FAISSStore:
             return []
         
         try:
-            # Normalize query embedding
-            query_embedding = query_embedding.reshape(1, -1).astype('float32')
-            faiss.normalize_L2(query_embedding)
-            
             # Search
-            scores, indices = index.search(query_embedding, min(k, index.ntotal))
-            
-            # Build results
-            results = []
-            for score, idx in zip(scores[0], indices[0]):
-                if idx == -1:  # FAISS returns -1 for empty slots
-                    continue
-                
-                vector_id = str(idx)
-                if vector_id in metadata:
-                    result = metadata[vector_id].copy()
-                    result["faiss_score"] = float(score)
-                    result["vector_id"] = vector_id
-                    results.append(result)
+            if vectors is not None:
+                scores, indices = self._search_tiled(vectors, query_embedding[0], min(k, len(vectors)))
+            else:
+                scores, indices = index.search(query_embedding, min(k, index.ntotal))
+            
+            results = self._build_results(metadata, scores[0], indices[0])
+            
+            if index_mtime is not None:
+                self.semantic_cache.add(doc_id, query_embedding, k, results, index_mtime)
             
             self.logger.info(f"FAISS search completed for {doc_id}, query_k={k}, results_count={len(results)}")
             
@@ -206,6 +364,125 @@ class FAISSStore:
             self.logger.error(f"Failed to search FAISS index for {doc_id}: {str(e)}", exc_info=True)
             return []
     
+    async def asearch(self, doc_id: str, query_embedding: np.ndarray, k: int = 20) -> List[Dict[str, Any]]:
+        """
+        Async variant of search that runs the blocking search in a worker thread.
+        
+        Args:
+            doc_id: Document identifier
+            query_embedding: Query embedding vector
+            k: Number of results to return
+            
+        Returns:
+            List of search results with metadata
+        """
+        return await asyncio.to_thread(self.search, doc_id, query_embedding, k)
+    
+    def search_batch(self, doc_id: str, query_embeddings: np.ndarray, k: int = 20) -> List[List[Dict[str, Any]]]:
+        """
+        Search for similar chunks for several queries in one index call.
+        
+        Batching amortizes index loading and, for GPU-resident indices, the
+        host-to-device transfer across queries.
+        
+        Args:
+            doc_id: Document identifier
+            query_embeddings: Query embedding matrix of shape (Q, dim)
+            k: Number of results to return per query
+            
+        Returns:
+            List of search results with metadata for each query
+        """
+        index = self.load_index(doc_id)
+        if index is None:
+            self.logger.warning(f"No FAISS index found for {doc_id}")
+            return [[] for _ in range(len(query_embeddings))]
+        
+        metadata = self._load_metadata(doc_id)
+        if not metadata:
+            self.logger.warning(f"No metadata found for {doc_id}")
+            return [[] for _ in range(len(query_embeddings))]
+        
+        try:
+            # Normalize query embeddings
+            query_embeddings = np.array(query_embeddings, dtype='float32').reshape(-1, self.embedding_dim)
+            faiss.normalize_L2(query_embeddings)
+            
+            # Search
+            scores, indices = index.search(query_embeddings, min(k, index.ntotal))
+            
+            results = [
+                self._build_results(metadata, row_scores, row_indices)
+                for row_scores, row_indices in zip(scores, indices)
+            ]
+            
+            self.logger.info(f"FAISS batch search completed for {doc_id}, queries_count={len(results)}, query_k={k}")
+            
+            return results
+            
+        except Exception as e:
+            self.logger.error(f"Failed to batch search FAISS index for {doc_id}: {str(e)}", exc_info=True)
+            return [[] for _ in range(len(query_embeddings))]
+    
+    def _build_results(self, metadata: Dict[str, Any], scores: np.ndarray, indices: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Attach chunk metadata to one row of search scores and vector indices.
+        
+        Args:
+            metadata: Metadata mapping vector IDs to chunk information
+            scores: Similarity scores for one query
+            indices: Vector indices for one query
+            
+        Returns:
+            List of search results with metadata
+        """
+        # Drop empty slots (FAISS returns -1) and convert to Python scalars in bulk
+        valid = indices != -1
+        vector_ids = [str(idx) for idx in indices[valid].tolist()]
+        
+        return [
+            {**metadata[vector_id], "faiss_score": score, "vector_id": vector_id}
+            for vector_id, score in zip(vector_ids, scores[valid].tolist())
+            if vector_id in metadata
+        ]
+    
+    def _search_tiled(self, vectors: np.ndarray, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact inner-product search split into row tiles scored in parallel.
+        
+        IndexFlatIP parallelizes over queries, so a single query scans the whole
+        matrix on one core. Scoring row tiles with BLAS releases the GIL and lets
+        one query use every core. Stored float16 rows are upcast in blocks of
+        TILE_BLOCK_ROWS, so no full float32 copy of the matrix is made.
+        
+        Args:
+            vectors: Normalized float16 vector matrix of shape (N, dim)
+            query: Normalized query vector of shape (dim,)
+            k: Number of results to return
+            
+        Returns:
+            Tuple of (scores, indices), each of shape (1, k), best match first
+        """
+        n = len(vectors)
+        scores = np.empty(n, dtype='float32')
+        
+        tile_size = -(-n // SEARCH_TILES)
+        
+        def score_tile(start: int) -> None:
+            end = min(start + tile_size, n)
+            for block_start in range(start, end, TILE_BLOCK_ROWS):
+                block_end = min(block_start + TILE_BLOCK_ROWS, end)
+                block = vectors[block_start:block_end].astype(np.float32)
+                np.dot(block, query, out=scores[block_start:block_end])
+        
+        list(get_tile_pool().map(score_tile, range(0, n, tile_size)))
+        
+        # Select the top k without a full sort, then order them by score
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        
+        return scores[top].reshape(1, -1), top.reshape(1, -1)
+    
     def get_stats(self, doc_id: str) -> Dict[str, Any]:
         """
         Get statistics about the FAISS index for a document.
@@ -240,23 +517,76 @@ class FAISSStore:
     
     def _generate_embeddings(self, chunks: List[Chunk]) -> np.ndarray:
         """
-        Generate embeddings for a list of chunks.
+        Generate L2-normalized embeddings for a list of chunks.
         
         Args:
             chunks: List of chunks to embed
             
         Returns:
-            Numpy array of embeddings
+            Numpy array of normalized embeddings, shape (N, embedding_dim)
         """
-        texts = [chunk.text for chunk in chunks]
+        try:
+            # Copy each embedding straight into its chunk's row of a preallocated
+            # matrix, normalized in place
+            embeddings = np.empty((len(chunks), self.embedding_dim), dtype=np.float32)
+            for batch in self._embedding_batches(chunks):
+                # base64 returns the raw float32 bytes, avoiding Python lists of floats
+                response = self.openai_client.embeddings.create(
+                    model=self.embedding_model,
+                    input=[chunks[i].text for i in batch],
+                    encoding_format="base64"
+                )
+                for i, data in zip(batch, response.data):
+                    embeddings[i] = np.frombuffer(base64.b64decode(data.embedding), dtype=np.float32)
+            normalize_embeddings(embeddings)
+            
+            self.logger.info(f"Generated {len(embeddings)} embeddings")
+            
+            return embeddings
+            
+        except Exception as e:
+            self.logger.error(f"Failed to generate embeddings: {str(e)}", exc_info=True)
+            raise
+    
+    async def _agenerate_embeddings(self, chunks: List[Chunk], async_client: AsyncOpenAI) -> np.ndarray:
+        """
+        Generate L2-normalized embeddings, with batches requested concurrently.
+        
+        At most EMBEDDING_CONCURRENCY requests are in flight; rate-limited
+        requests are retried with exponential backoff.
+        
+        Args:
+            chunks: List of chunks to embed
+            async_client: Async OpenAI client
+            
+        Returns:
+            Numpy array of normalized embeddings, shape (N, embedding_dim)
+        """
+        embeddings = np.empty((len(chunks), self.embedding_dim), dtype=np.float32)
+        semaphore = asyncio.Semaphore(EMBEDDING_CONCURRENCY)
+        
+        async def embed_batch(batch: List[int]) -> None:
+            texts = [chunks[i].text for i in batch]
+            async with semaphore:
+                for attempt in range(EMBEDDING_MAX_RETRIES + 1):
+                    try:
+                        response = await async_client.embeddings.create(
+                            model=self.embedding_model, input=texts, encoding_format="base64"
+                        )
+                        break
+                    except RateLimitError:
+                        if attempt == EMBEDDING_MAX_RETRIES:
+                            raise
+                        self.logger.warning(f"Embedding request rate limited, retry {attempt + 1}/{EMBEDDING_MAX_RETRIES}")
+                        await asyncio.sleep(2 ** attempt)
+            
+            for i, data in zip(batch, response.data):
+                embeddings[i] = np.frombuffer(base64.b64decode(data.embedding), dtype=np.float32)
         
         try:
-            response = self.openai_client.embeddings.create(
-                model=self.embedding_model,
-                input=texts
-            )
+            await asyncio.gather(*[embed_batch(batch) for batch in self._embedding_batches(chunks)])
+            normalize_embeddings(embeddings)
             
-            embeddings = np.array([data.embedding for data in response.data], dtype='float32')
             self.logger.info(f"Generated {len(embeddings)} embeddings")
             
             return embeddings
@@ -265,6 +595,36 @@ class FAISSStore:
             self.logger.error(f"Failed to generate embeddings: {str(e)}", exc_info=True)
             raise
     
+    def _embedding_batches(self, chunks: List[Chunk]) -> List[List[int]]:
+        """
+        Group chunk positions into embedding requests of similar-length chunks.
+        
+        Chunks are taken longest first, so each request holds chunks of similar
+        token counts; a request closes at EMBEDDING_BATCH_SIZE chunks or
+        EMBEDDING_BATCH_MAX_TOKENS tokens.
+        
+        Args:
+            chunks: List of chunks to embed
+            
+        Returns:
+            Lists of chunk positions, one per request
+        """
+        token_counts = np.fromiter((chunk.token_count for chunk in chunks), dtype=np.int64, count=len(chunks))
+        
+        batches = []
+        batch, batch_tokens = [], 0
+        for i in np.argsort(-token_counts, kind="stable").tolist():
+            if batch and (len(batch) == EMBEDDING_BATCH_SIZE or
+                          batch_tokens + token_counts[i] > EMBEDDING_BATCH_MAX_TOKENS):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(i)
+            batch_tokens += token_counts[i]
+        if batch:
+            batches.append(batch)
+        
+        return batches
+    
     def _load_metadata(self, doc_id: str) -> Dict[str, Any]:
         """
         Load metadata for a document.
@@ -281,8 +641,7 @@ class FAISSStore:
             return {}
         
         try:
-            with open(meta_path, 'r') as f:
-                return json.load(f)
+            return orjson.loads(meta_path.read_bytes())
         except Exception as e:
             self.logger.error(f"Failed to load metadata for {doc_id}: {str(e)}", exc_info=True)
             return {}
@@ -291,6 +650,40 @@ class FAISSStore:
         """Get the path to the FAISS index file."""
         return settings.paths["indices"] / f"{doc_id}.faiss"
     
+    def _load_vectors(self, doc_id: str) -> Optional[np.ndarray]:
+        """
+        Memory-map the stored embeddings of a large document for tiled search.
+        
+        Only documents whose saved index is a flat inner-product index qualify;
+        any other index (HNSW, scalar-quantized, L2) is searched through itself.
+        
+        Args:
+            doc_id: Document identifier
+            
+        Returns:
+            Read-only (N, dim) float16 array if the document qualifies, None otherwise
+        """
+        embeddings_path = self._get_embeddings_path(doc_id)
+        index_path = self._get_index_path(doc_id)
+        
+        if not embeddings_path.exists() or not index_path.exists():
+            return None
+        
+        try:
+            with open(index_path, 'rb') as f:
+                if f.read(4) != FLAT_IP_INDEX_FOURCC:
+                    return None
+            
+            vectors = np.load(embeddings_path, mmap_mode='r')
+            return vectors if len(vectors) > settings.TILED_SEARCH_MIN_VECTORS else None
+        except Exception as e:
+            self.logger.warning(f"Failed to load vectors for {doc_id}: {str(e)}")
+            return None
+    
+    def _get_embeddings_path(self, doc_id: str) -> Path:
+        """Get the path to the raw float16 embeddings file."""
+        return settings.paths["indices"] / f"{doc_id}.embeddings.npy"
+    
     def _get_meta_path(self, doc_id: str) -> Path:
         """Get the path to the metadata file."""
         return settings.paths["indices"] / f"{doc_id}.faiss.meta.json"
@@ -0,0 +1,158 @@
+"""
+Semantic cache for vector search results.
+Serves repeated or near-duplicate queries without re-running the search.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Dict, Any, Optional
+
+import faiss
+import numpy as np
+
+from config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    """Cached search results for one query embedding."""
+    doc_id: str
+    k: int
+    results: List[Dict[str, Any]]
+    created_at: float
+    index_mtime: float
+
+
+class SemanticCache:
+    """Process-wide cache of search results keyed by normalized query embedding."""
+    
+    def __init__(self, dim: int = 1536, max_entries: int = 4096,
+                 similarity_threshold: float = 0.97, ttl_seconds: float = 3600.0):
+        """
+        Initialize the semantic cache.
+        
+        Args:
+            dim: Embedding dimension
+            max_entries: Maximum number of cached queries (least recently used are evicted)
+            similarity_threshold: Minimum cosine similarity for a cache hit
+            ttl_seconds: Maximum age of a cached entry
+        """
+        self.logger = logger
+        self.dim = dim
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        
+        # Inner product over normalized embeddings; IDMap allows evicting single entries
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+        self._entries: "OrderedDict[int, CacheEntry]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+    
+    def lookup(self, doc_id: str, query_embedding: np.ndarray, k: int,
+               index_mtime: float) -> Optional[List[Dict[str, Any]]]:
+        """
+        Look up cached results for a query.
+        
+        Args:
+            doc_id: Document identifier
+            query_embedding: Normalized query embedding of shape (1, dim)
+            k: Number of results requested
+            index_mtime: Modification time of the document's index file
+        
+        Returns:
+            Copy of the cached results on a hit, None otherwise
+        """
+        with self._lock:
+            if self.index.ntotal == 0:
+                return None
+            
+            # Several neighbours, since the closest one may belong to another document
+            scores, ids = self.index.search(query_embedding, min(8, self.index.ntotal))
+            now = time.time()
+            
+            for score, entry_id in zip(scores[0], ids[0]):
+                if entry_id == -1 or score < self.similarity_threshold:
+                    break
+                
+                entry = self._entries.get(int(entry_id))
+                if entry is None or entry.doc_id != doc_id or entry.k != k:
+                    continue
+                
+                if now - entry.created_at > self.ttl_seconds or entry.index_mtime != index_mtime:
+                    self._remove(int(entry_id))
+                    continue
+                
+                self._entries.move_to_end(int(entry_id))
+                self.logger.info(f"Semantic cache hit for {doc_id}, similarity={float(score):.4f}")
+                return [result.copy() for result in entry.results]
+        
+        return None
+    
+    def add(self, doc_id: str, query_embedding: np.ndarray, k: int,
+            results: List[Dict[str, Any]], index_mtime: float) -> None:
+        """
+        Cache the results of a query.
+        
+        Args:
+            doc_id: Document identifier
+            query_embedding: Normalized query embedding of shape (1, dim)
+            k: Number of results requested
+            results: Search results to cache
+            index_mtime: Modification time of the document's index file
+        """
+        with self._lock:
+            while len(self._entries) >= self.max_entries:
+                self._remove(next(iter(self._entries)))
+            
+            entry_id = self._next_id
+            self._next_id += 1
+            
+            self.index.add_with_ids(query_embedding, np.array([entry_id], dtype='int64'))
+            self._entries[entry_id] = CacheEntry(
+                doc_id=doc_id,
+                k=k,
+                results=[result.copy() for result in results],
+                created_at=time.time(),
+                index_mtime=index_mtime
+            )
+    
+    def invalidate(self, doc_id: str) -> None:
+        """
+        Drop all cached entries for a document.
+        
+        Args:
+            doc_id: Document identifier
+        """
+        with self._lock:
+            stale_ids = [entry_id for entry_id, entry in self._entries.items() if entry.doc_id == doc_id]
+            for entry_id in stale_ids:
+                self._remove(entry_id)
+        
+        if stale_ids:
+            self.logger.info(f"Invalidated semantic cache for {doc_id}, entries_count={len(stale_ids)}")
+    
+    def _remove(self, entry_id: int) -> None:
+        """Remove an entry from the index and the entry table (lock must be held)."""
+        self.index.remove_ids(np.array([entry_id], dtype='int64'))
+        del self._entries[entry_id]
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@lru_cache(maxsize=1)
+def get_semantic_cache() -> SemanticCache:
+    """Get the process-wide semantic cache shared by all FAISS stores."""
+    return SemanticCache(
+        max_entries=settings.SEMANTIC_CACHE_SIZE,
+        similarity_threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+        ttl_seconds=settings.SEMANTIC_CACHE_TTL
+    )
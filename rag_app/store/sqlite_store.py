@@ -3,19 +3,38 @@ SQLite FTS5 store implementation for keyword search.
 Handles creation, loading, and searching of full-text search indices.
 """
 
+import asyncio
 import logging
+import os
+import re
+import secrets
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
 import sqlite3
 from sqlite3 import Connection
 
 from config import settings
+from store.bm25_index import BM25Index
 from utils.chunking import Chunk
 
 
 logger = logging.getLogger(__name__)
 
+# Number of per-document read connections kept open (least recently used are closed)
+MAX_CACHED_CONNECTIONS = 16
+
+# Query terms kept for FTS5: word characters and hyphens, split on everything else
+FTS_TERM_PATTERN = re.compile(r"[\w\-]+")
+
+# Queries with more terms than this match any term (OR) instead of all terms (AND)
+FTS_AND_MAX_TERMS = 3
+
+# Terms at least this long also match as prefixes ("borrow" matches "borrower")
+FTS_PREFIX_MIN_LENGTH = 4
+
 
 class SQLiteStore:
     """SQLite FTS5 store for keyword search."""
@@ -24,73 +43,67 @@ class SQLiteStore:
         """Initialize the SQLite store."""
         self.logger = logger
         
+        # Warm read connections by doc_id, each paired with a lock serializing its use
+        # and the (device, inode) of the database file it was opened on
+        self._conn_cache: "OrderedDict[str, Tuple[Connection, threading.Lock, Tuple[int, int]]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        
+        # Precomputed BM25 indices by doc_id, with the file mtime they were loaded at
+        self._bm25_cache: "OrderedDict[str, Tuple[float, BM25Index]]" = OrderedDict()
+        
         # Ensure sqlite directory exists
         settings.paths["sqlite"].mkdir(parents=True, exist_ok=True)
     
-    def create_database(self, doc_id: str) -> Connection:
+    def create_database(self, doc_id: str, sync_triggers: bool = True) -> Connection:
         """
-        Create a new SQLite database with FTS5 for a document.
+        Create a new, empty SQLite database with FTS5 for a document.
+        
+        The database is built at a temporary path and moved over any existing
+        one, so readers (including other SQLiteStore instances) never see a
+        missing or half-created file.
         
         Args:
             doc_id: Document identifier
+            sync_triggers: Install triggers that keep FTS5 in sync with row-level
+                writes. Bulk loaders can skip them and rebuild the index once.
             
         Returns:
             SQLite connection
         """
         db_path = self._get_db_path(doc_id)
+        tmp_db_path = self._get_tmp_db_path(doc_id)
+        
+        conn = self._new_database(doc_id, tmp_db_path, sync_triggers)
         
-        # Remove existing database if it exists
-        if db_path.exists():
-            db_path.unlink()
+        # The returned connection follows the file across the rename
+        self._get_bm25_path(doc_id).unlink(missing_ok=True)
+        os.replace(tmp_db_path, db_path)
         
+        return conn
+    
+    def _new_database(self, doc_id: str, db_path: Path, sync_triggers: bool) -> Connection:
+        """
+        Create the schema in a fresh database file, replacing any file at db_path.
+        
+        Args:
+            doc_id: Document identifier
+            db_path: Path of the database file to create
+            sync_triggers: Install the FTS5 sync triggers
+            
+        Returns:
+            SQLite connection
+        """
+        db_path.unlink(missing_ok=True)
         conn = sqlite3.connect(str(db_path))
         
         try:
-            # Create chunks table
-            conn.execute("""
-                CREATE TABLE chunks (
-                    id INTEGER PRIMARY KEY,
-                    page INTEGER NOT NULL,
-                    section TEXT,
-                    text TEXT NOT NULL,
-                    char_start INTEGER NOT NULL,
-                    char_end INTEGER NOT NULL,
-                    chunk_id TEXT NOT NULL UNIQUE,
-                    token_count INTEGER NOT NULL
-                )
-            """)
-            
-            # Create FTS5 virtual table
-            conn.execute("""
-                CREATE VIRTUAL TABLE chunks_fts USING fts5(
-                    text,
-                    content='chunks',
-                    content_rowid='id'
-                )
-            """)
-            
-            # Create triggers to keep FTS5 in sync with chunks table
-            conn.execute("""
-                CREATE TRIGGER chunks_ai AFTER INSERT ON chunks BEGIN
-                    INSERT INTO chunks_fts(rowid, text) VALUES (new.id, new.text);
-                END
-            """)
-            
-            conn.execute("""
-                CREATE TRIGGER chunks_ad AFTER DELETE ON chunks BEGIN
-                    INSERT INTO chunks_fts(chunks_fts, rowid, text) VALUES('delete', old.id, old.text);
-                END
-            """)
-            
-            conn.execute("""
-                CREATE TRIGGER chunks_au AFTER UPDATE ON chunks BEGIN
-                    INSERT INTO chunks_fts(chunks_fts, rowid, text) VALUES('delete', old.id, old.text);
-                    INSERT INTO chunks_fts(rowid, text) VALUES (new.id, new.text);
-                END
-            """)
+            self._create_schema_no_triggers(conn)
+            
+            if sync_triggers:
+                self._install_sync_triggers(conn)
             
             conn.commit()
-            self.logger.info(f"Created SQLite database for {doc_id}, db_path={str(db_path)}")
+            self.logger.info(f"Created SQLite database for {doc_id}, db_path={str(db_path)}, sync_triggers={sync_triggers}")
             
         except Exception as e:
             conn.close()
@@ -99,10 +112,131 @@ class SQLiteStore:
         
         return conn
     
+    def _create_schema_no_triggers(self, conn: Connection) -> None:
+        """Create the chunks table and its external-content FTS5 index."""
+        # Create chunks table
+        conn.execute("""
+            CREATE TABLE chunks (
+                id INTEGER PRIMARY KEY,
+                page INTEGER NOT NULL,
+                section TEXT,
+                text TEXT NOT NULL,
+                char_start INTEGER NOT NULL,
+                char_end INTEGER NOT NULL,
+                chunk_id TEXT NOT NULL UNIQUE,
+                token_count INTEGER NOT NULL
+            )
+        """)
+        
+        # Create FTS5 virtual table
+        conn.execute("""
+            CREATE VIRTUAL TABLE chunks_fts USING fts5(
+                text,
+                content='chunks',
+                content_rowid='id'
+            )
+        """)
+    
+    def _install_sync_triggers(self, conn: Connection) -> None:
+        """Create triggers to keep FTS5 in sync with incremental chunks writes."""
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS chunks_ai AFTER INSERT ON chunks BEGIN
+                INSERT INTO chunks_fts(rowid, text) VALUES (new.id, new.text);
+            END
+        """)
+        
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS chunks_ad AFTER DELETE ON chunks BEGIN
+                INSERT INTO chunks_fts(chunks_fts, rowid, text) VALUES('delete', old.id, old.text);
+            END
+        """)
+        
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS chunks_au AFTER UPDATE ON chunks BEGIN
+                INSERT INTO chunks_fts(chunks_fts, rowid, text) VALUES('delete', old.id, old.text);
+                INSERT INTO chunks_fts(rowid, text) VALUES (new.id, new.text);
+            END
+        """)
+    
     def load_database(self, doc_id: str) -> Optional[Connection]:
         """
         Load an existing SQLite database for a document.
         
+        Connections are cached per document and shared across calls, so callers
+        must not close the returned connection.
+        
+        Args:
+            doc_id: Document identifier
+            
+        Returns:
+            SQLite connection if found, None otherwise
+        """
+        entry = self._get_connection(doc_id)
+        return entry[0] if entry else None
+    
+    def close(self) -> None:
+        """Close all cached read connections."""
+        with self._cache_lock:
+            doc_ids = list(self._conn_cache)
+        for doc_id in doc_ids:
+            self._evict_connection(doc_id)
+    
+    def _get_connection(self, doc_id: str) -> Optional[Tuple[Connection, threading.Lock]]:
+        """
+        Get the cached connection and its lock for a document, opening it on first use.
+        
+        A cached connection is reused only while it still points at the current
+        database file. A re-ingest (by this or any other store instance) replaces
+        the file, and the stale connection is then closed and reopened.
+        
+        Args:
+            doc_id: Document identifier
+            
+        Returns:
+            Tuple of (connection, lock) if the database exists, None otherwise
+        """
+        try:
+            stat = self._get_db_path(doc_id).stat()
+        except FileNotFoundError:
+            self._evict_connection(doc_id)
+            return None
+        file_id = (stat.st_dev, stat.st_ino)
+        
+        with self._cache_lock:
+            entry = self._conn_cache.get(doc_id)
+            if entry is not None and entry[2] == file_id:
+                self._conn_cache.move_to_end(doc_id)
+                return entry[:2]
+        
+        conn = self._open_database(doc_id)
+        if conn is None:
+            return None
+        
+        evicted = []
+        with self._cache_lock:
+            # Another thread may have opened the same database meanwhile
+            entry = self._conn_cache.get(doc_id)
+            if entry is None or entry[2] != file_id:
+                if entry is not None:
+                    evicted.append(entry)
+                entry = (conn, threading.Lock(), file_id)
+                self._conn_cache[doc_id] = entry
+                self._conn_cache.move_to_end(doc_id)
+                while len(self._conn_cache) > MAX_CACHED_CONNECTIONS:
+                    evicted.append(self._conn_cache.popitem(last=False)[1])
+            else:
+                evicted.append((conn, threading.Lock(), file_id))
+        
+        for old_conn, old_lock, _ in evicted:
+            with old_lock:
+                old_conn.close()
+        
+        return entry[:2]
+    
+    def _open_database(self, doc_id: str) -> Optional[Connection]:
+        """
+        Open and verify the SQLite database for a document.
+        
         Args:
             doc_id: Document identifier
             
@@ -115,7 +249,12 @@ class SQLiteStore:
             return None
         
         try:
-            conn = sqlite3.connect(str(db_path))
+            # Shared across request threads; each use holds the connection's lock
+            conn = sqlite3.connect(str(db_path), check_same_thread=False)
+            
+            # Larger page cache, and mmap so hot pages are served from the OS page cache
+            conn.execute("PRAGMA cache_size=-65536")
+            conn.execute("PRAGMA mmap_size=268435456")
             
             # Verify the database has the required tables
             cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name IN ('chunks', 'chunks_fts')")
@@ -137,6 +276,16 @@ class SQLiteStore:
             self.logger.error(f"Failed to load SQLite database for {doc_id}: {str(e)}", exc_info=True)
             return None
     
+    def _evict_connection(self, doc_id: str) -> None:
+        """Remove a document's cached connection and close it once idle."""
+        with self._cache_lock:
+            entry = self._conn_cache.pop(doc_id, None)
+        
+        if entry is not None:
+            conn, lock, _ = entry
+            with lock:
+                conn.close()
+    
     def upsert_chunks(self, doc_id: str, chunks: List[Chunk]) -> None:
         """
         Upsert chunks into the SQLite database (replaces existing data).
@@ -151,18 +300,19 @@ class SQLiteStore:
         
         self.logger.info(f"Starting SQLite upsert for {doc_id}, chunks_count={len(chunks)}")
         
-        # Create new database (this replaces any existing one)
-        conn = self.create_database(doc_id)
+        # Build the new database next to the live one and swap it in once complete,
+        # so readers keep the old data until then. Triggers are skipped so the
+        # FTS5 index is built in a single pass after the load.
+        tmp_db_path = self._get_tmp_db_path(doc_id)
+        conn = self._new_database(doc_id, tmp_db_path, sync_triggers=False)
         
         try:
-            # Insert chunks
-            cursor = conn.cursor()
-            
-            for chunk in chunks:
-                cursor.execute("""
-                    INSERT INTO chunks (page, section, text, char_start, char_end, chunk_id, token_count)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (
+            # Bulk insert chunks
+            conn.executemany("""
+                INSERT INTO chunks (page, section, text, char_start, char_end, chunk_id, token_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (
+                (
                     chunk.page,
                     chunk.section,
                     chunk.text,
@@ -170,24 +320,44 @@ class SQLiteStore:
                     chunk.char_end,
                     chunk.chunk_id,
                     chunk.token_count
-                ))
+                )
+                for chunk in chunks
+            ))
+            
+            # Materialize the FTS5 index from the content table, then merge its b-trees
+            conn.execute("INSERT INTO chunks_fts(chunks_fts) VALUES('rebuild')")
+            conn.execute("INSERT INTO chunks_fts(chunks_fts) VALUES('optimize')")
+            
+            # Keep later row-level writes in sync with the index
+            self._install_sync_triggers(conn)
+            
+            # Tag this build, so a BM25 index is only used with the database it was built from
+            build_id = secrets.randbits(31) or 1
+            conn.execute(f"PRAGMA user_version = {build_id}")
             
             conn.commit()
             
+            # Precompute BM25 scores so queries only sum the matching terms' rows
+            rows = conn.execute("SELECT id, text FROM chunks ORDER BY id").fetchall()
+            bm25_index = BM25Index.build([row[0] for row in rows], [row[1] for row in rows], build_id=build_id)
+            bm25_index.save(self._get_bm25_path(doc_id))
+            
             # Verify FTS5 is populated
             cursor = conn.execute("SELECT COUNT(*) FROM chunks_fts")
             fts_count = cursor.fetchone()[0]
             
+            conn.close()
+            os.replace(tmp_db_path, self._get_db_path(doc_id))
+            
             self.logger.info(
                 f"SQLite upsert completed for {doc_id}, chunks_count={len(chunks)}, fts_count={fts_count}"
             )
             
         except Exception as e:
-            conn.rollback()
+            conn.close()
+            tmp_db_path.unlink(missing_ok=True)
             self.logger.error(f"Failed to upsert chunks for {doc_id}: {str(e)}", exc_info=True)
             raise
-        finally:
-            conn.close()
     
     def bm25_search(self, doc_id: str, query: str, k: int = 20) -> List[Dict[str, Any]]:
         """
@@ -201,13 +371,28 @@ class SQLiteStore:
         Returns:
             List of search results with metadata
         """
-        conn = self.load_database(doc_id)
-        if conn is None:
+        entry = self._get_connection(doc_id)
+        if entry is None:
             self.logger.warning(f"No SQLite database found for {doc_id}")
             return []
         
+        # Databases built before precomputed BM25, or whose BM25 index belongs to
+        # another build, fall back to FTS5 ranking
+        bm25_index = self._get_bm25_index(doc_id)
+        if bm25_index is not None:
+            results = self._precomputed_bm25_search(doc_id, entry, bm25_index, query, k)
+            if results is not None:
+                return results
+        
+        fts_query = self._compile_fts_query(query)
+        if not fts_query:
+            self.logger.warning(f"No searchable terms in query for {doc_id}, query={query}")
+            return []
+        
+        conn, lock = entry
+        lock.acquire()
         try:
-            # Use FTS5 bm25() function for scoring
+            # FTS5 rank is bm25() by default and is computed once per row
             cursor = conn.execute("""
                 SELECT 
                     c.id,
@@ -218,13 +403,13 @@ class SQLiteStore:
                     c.char_end,
                     c.chunk_id,
                     c.token_count,
-                    bm25(chunks_fts) as bm25_score
+                    chunks_fts.rank as bm25_score
                 FROM chunks_fts
                 JOIN chunks c ON chunks_fts.rowid = c.id
                 WHERE chunks_fts MATCH ?
-                ORDER BY bm25(chunks_fts)
+                ORDER BY chunks_fts.rank
                 LIMIT ?
-            """, (query, k))
+            """, (fts_query, k))
             
             results = []
             for row in cursor.fetchall():
@@ -241,13 +426,7 @@ class SQLiteStore:
                 }
                 results.append(result)
             
-            self.logger.info(
-                f"BM25 search completed for {doc_id}",
-                doc_id=doc_id,
-                query=query,
-                query_k=k,
-                results_count=len(results)
-            )
+            self.logger.info(f"BM25 search completed for {doc_id}, query={fts_query}, query_k={k}, results_count={len(results)}")
             
             return results
             
@@ -255,7 +434,162 @@ class SQLiteStore:
             self.logger.error(f"Failed to search SQLite database for {doc_id}: {str(e)}", exc_info=True)
             return []
         finally:
-            conn.close()
+            lock.release()
+    
+    def _precomputed_bm25_search(self, doc_id: str, entry: Tuple[Connection, threading.Lock],
+                                 bm25_index: BM25Index, query: str, k: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Rank chunks with the precomputed BM25 index and load their rows from SQLite.
+        
+        Uses the same plan as the FTS5 query: short queries require every term,
+        longer ones match any term. Scores are negated to match FTS5 rank, where
+        lower is better.
+        
+        Args:
+            doc_id: Document identifier
+            entry: Cached (connection, lock) for the document
+            bm25_index: Precomputed BM25 index for the document
+            query: Search query
+            k: Number of results to return
+            
+        Returns:
+            List of search results with metadata, best first, or None if the
+            index was not built from the connection's database
+        """
+        conn, lock = entry
+        lock.acquire()
+        try:
+            db_build_id = conn.execute("PRAGMA user_version").fetchone()[0]
+        finally:
+            lock.release()
+        
+        if bm25_index.build_id is None or bm25_index.build_id != db_build_id:
+            self.logger.warning(f"BM25 index for {doc_id} does not match its database, using FTS5 ranking")
+            return None
+        
+        require_all = len(self._query_terms(query)) <= FTS_AND_MAX_TERMS
+        row_ids, scores = bm25_index.search(
+            query, k, prefix_min_length=FTS_PREFIX_MIN_LENGTH, require_all=require_all
+        )
+        if len(row_ids) == 0:
+            self.logger.info(f"BM25 search completed for {doc_id}, query={query}, query_k={k}, results_count=0")
+            return []
+        
+        lock.acquire()
+        try:
+            placeholders = ",".join("?" * len(row_ids))
+            cursor = conn.execute(f"""
+                SELECT id, page, section, text, char_start, char_end, chunk_id, token_count
+                FROM chunks
+                WHERE id IN ({placeholders})
+            """, row_ids.tolist())
+            rows = {row[0]: row for row in cursor.fetchall()}
+        except Exception as e:
+            self.logger.error(f"Failed to search SQLite database for {doc_id}: {str(e)}", exc_info=True)
+            return []
+        finally:
+            lock.release()
+        
+        results = []
+        for row_id, score in zip(row_ids.tolist(), scores.tolist()):
+            row = rows.get(row_id)
+            if row is None:
+                continue
+            results.append({
+                "id": row[0],
+                "page": row[1],
+                "section": row[2],
+                "text": row[3],
+                "char_start": row[4],
+                "char_end": row[5],
+                "chunk_id": row[6],
+                "token_count": row[7],
+                "bm25_score": -score
+            })
+        
+        self.logger.info(f"BM25 search completed for {doc_id}, query={query}, query_k={k}, results_count={len(results)}")
+        
+        return results
+    
+    def _get_bm25_index(self, doc_id: str) -> Optional[BM25Index]:
+        """
+        Get the precomputed BM25 index for a document, reloading it when the file changes.
+        
+        Args:
+            doc_id: Document identifier
+            
+        Returns:
+            BM25Index if one was saved for the document, None otherwise
+        """
+        bm25_path = self._get_bm25_path(doc_id)
+        try:
+            mtime = bm25_path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+        
+        with self._cache_lock:
+            cached = self._bm25_cache.get(doc_id)
+            if cached is not None and cached[0] == mtime:
+                self._bm25_cache.move_to_end(doc_id)
+                return cached[1]
+        
+        try:
+            bm25_index = BM25Index.load(bm25_path)
+        except Exception as e:
+            self.logger.warning(f"Failed to load BM25 index for {doc_id}: {str(e)}")
+            return None
+        
+        with self._cache_lock:
+            self._bm25_cache[doc_id] = (mtime, bm25_index)
+            self._bm25_cache.move_to_end(doc_id)
+            while len(self._bm25_cache) > MAX_CACHED_CONNECTIONS:
+                self._bm25_cache.popitem(last=False)
+        
+        return bm25_index
+    
+    def _compile_fts_query(self, query: str) -> str:
+        """
+        Compile a free-text question into a safe FTS5 MATCH expression.
+        
+        Terms are split on punctuation and quoted so FTS5 operators and
+        syntax characters in user input cannot break the query. Longer terms
+        also match as prefixes. Short queries require every term; long
+        questions match any term and rely on bm25 ranking.
+        
+        Args:
+            query: Raw search query
+            
+        Returns:
+            FTS5 query string, empty if the query has no searchable terms
+        """
+        terms = []
+        for term in self._query_terms(query):
+            quoted = f'"{term}"'
+            if len(term) >= FTS_PREFIX_MIN_LENGTH:
+                quoted += "*"
+            terms.append(quoted)
+        
+        separator = " " if len(terms) <= FTS_AND_MAX_TERMS else " OR "
+        return separator.join(terms)
+    
+    def _query_terms(self, query: str) -> List[str]:
+        """Split a query into search terms: word characters and inner hyphens."""
+        terms = (raw_term.strip("-") for raw_term in FTS_TERM_PATTERN.findall(query))
+        return [term for term in terms if term]
+    
+    async def abm25_search(self, doc_id: str, query: str, k: int = 20) -> List[Dict[str, Any]]:
+        """
+        Async variant of bm25_search that runs the blocking query in a worker thread.
+        
+        Args:
+            doc_id: Document identifier
+            query: Search query
+            k: Number of results to return
+            
+        Returns:
+            List of search results with metadata
+        """
+        return await asyncio.to_thread(self.bm25_search, doc_id, query, k)
     
     def get_stats(self, doc_id: str) -> Dict[str, Any]:
         """
@@ -272,10 +606,12 @@ class SQLiteStore:
         if not db_path.exists():
             return {"exists": False}
         
-        conn = self.load_database(doc_id)
-        if conn is None:
+        entry = self._get_connection(doc_id)
+        if entry is None:
             return {"exists": False, "error": "Failed to load database"}
         
+        conn, lock = entry
+        lock.acquire()
         try:
             # Get chunk count
             cursor = conn.execute("SELECT COUNT(*) FROM chunks")
@@ -306,8 +642,16 @@ class SQLiteStore:
             self.logger.error(f"Failed to get SQLite stats for {doc_id}: {str(e)}", exc_info=True)
             return {"exists": False, "error": str(e)}
         finally:
-            conn.close()
+            lock.release()
     
     def _get_db_path(self, doc_id: str) -> Path:
         """Get the path to the SQLite database file."""
         return settings.paths["sqlite"] / f"{doc_id}.db"
+    
+    def _get_tmp_db_path(self, doc_id: str) -> Path:
+        """Get the path a replacement SQLite database is built at."""
+        return settings.paths["sqlite"] / f"{doc_id}.db.tmp"
+    
+    def _get_bm25_path(self, doc_id: str) -> Path:
+        """Get the path to the precomputed BM25 index file."""
+        return settings.paths["sqlite"] / f"{doc_id}.bm25.npz"
@@ -0,0 +1,16 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="session")
+def client():
+    """One TestClient, and one app startup, shared by the whole test session."""
+    # Imported here so tests that don't need the app still run if it fails to import
+    from rag_app.app import app
+    
+    with TestClient(app) as c:
+        yield c
@@ -0,0 +1,53 @@
+"""
+Tests for the precomputed BM25 index.
+"""
+
+from store.bm25_index import BM25Index
+
+
+class TestBM25Index:
+    """Test cases for BM25Index."""
+    
+    def setup_method(self):
+        """Setup test fixtures."""
+        texts = [
+            "The borrower shall repay the loan.",
+            "The lender and the borrowers agree to the terms.",
+            "Nothing relevant here.",
+        ]
+        self.index = BM25Index.build([1, 2, 3], texts)
+    
+    def test_search_ranks_matching_chunks(self):
+        """Test that only chunks containing query terms are returned, best first."""
+        row_ids, scores = self.index.search("Who is the lender?", k=5)
+        
+        assert row_ids.tolist()[0] == 2
+        assert 3 not in row_ids.tolist()
+        assert list(scores) == sorted(scores, reverse=True)
+    
+    def test_prefix_matching(self):
+        """Test that long query terms also match indexed terms they prefix."""
+        row_ids, _ = self.index.search("borrow", k=5)
+        assert len(row_ids) == 0
+        
+        row_ids, _ = self.index.search("borrow", k=5, prefix_min_length=4)
+        assert sorted(row_ids.tolist()) == [1, 2]
+    
+    def test_require_all_terms(self):
+        """Test that require_all only returns chunks containing every query term."""
+        row_ids, _ = self.index.search("borrower loan", k=5, require_all=True)
+        assert row_ids.tolist() == [1]
+        
+        row_ids, _ = self.index.search("borrower unknown", k=5, require_all=True)
+        assert len(row_ids) == 0
+    
+    def test_save_and_load(self, tmp_path):
+        """Test that a saved index returns the same results after loading."""
+        path = tmp_path / "doc.bm25.npz"
+        self.index.save(path)
+        
+        loaded = BM25Index.load(path)
+        
+        assert loaded.search("repay loan", k=5)[0].tolist() == self.index.search("repay loan", k=5)[0].tolist()
+        assert loaded.build_id is None
+        assert list(tmp_path.iterdir()) == [path]
@@ -3,18 +3,34 @@ Tests for text chunking functionality.
 """
 
 import pytest
-from utils.chunking import TokenAwareChunker, Chunk
+from utils.chunking import TokenAwareChunker, Chunk, ChunkBatch
 from utils.parsing import PageText
 
 
+@pytest.fixture(scope="module")
+def chunker():
+    """Chunker shared by every test in this module."""
+    return TokenAwareChunker(chunk_size=100, chunk_overlap=20)
+
+
+@pytest.fixture(scope="module")
+def long_pages():
+    """A single page much longer than one 100-token chunk."""
+    return [
+        PageText(
+            doc_id="test_doc",
+            page=1,
+            text="This is a sentence. " * 50,
+            section="Test Section",
+            order=0
+        )
+    ]
+
+
 class TestTokenAwareChunker:
     """Test cases for TokenAwareChunker."""
     
-    def setup_method(self):
-        """Setup test fixtures."""
-        self.chunker = TokenAwareChunker(chunk_size=100, chunk_overlap=20)
-    
-    def test_chunk_small_text(self):
+    def test_chunk_small_text(self, chunker):
         """Test chunking of text that fits in one chunk."""
         pages = [
             PageText(
@@ -26,7 +42,7 @@ class TestTokenAwareChunker:
             )
         ]
         
-        chunks = self.chunker.chunk_pages(pages, "test_doc")
+        chunks = chunker.chunk_pages(pages, "test_doc")
         
         assert len(chunks) == 1
         assert chunks[0].doc_id == "test_doc"
@@ -35,22 +51,9 @@ class TestTokenAwareChunker:
         assert chunks[0].text == pages[0].text
         assert chunks[0].token_count <= 100
     
-    def test_chunk_large_text(self):
+    def test_chunk_large_text(self, chunker, long_pages):
         """Test chunking of text that requires multiple chunks."""
-        # Create a long text that will exceed chunk size
-        long_text = "This is a sentence. " * 50  # Should be much longer than 100 tokens
-        
-        pages = [
-            PageText(
-                doc_id="test_doc",
-                page=1,
-                text=long_text,
-                section="Test Section",
-                order=0
-            )
-        ]
-        
-        chunks = self.chunker.chunk_pages(pages, "test_doc")
+        chunks = chunker.chunk_pages(long_pages, "test_doc")
         
         assert len(chunks) > 1
         assert all(chunk.doc_id == "test_doc" for chunk in chunks)
@@ -61,7 +64,7 @@ class TestTokenAwareChunker:
         for chunk in chunks:
             assert chunk.token_count <= 100 * 1.1  # Allow 10% tolerance
     
-    def test_chunk_overlap(self):
+    def test_chunk_overlap(self, chunker):
         """Test that chunks have proper overlap."""
         # Create text that will produce exactly 2 chunks
         text = "This is a sentence. " * 30  # Should produce 2 chunks with overlap
@@ -76,14 +79,14 @@ class TestTokenAwareChunker:
             )
         ]
         
-        chunks = self.chunker.chunk_pages(pages, "test_doc")
+        chunks = chunker.chunk_pages(pages, "test_doc")
         
         if len(chunks) >= 2:
             # Check that there's some overlap between consecutive chunks
             # This is a basic check - in practice, overlap is handled at token level
             assert chunks[0].char_end > chunks[1].char_start or chunks[1].char_end > chunks[0].char_start
     
-    def test_chunk_metadata_preservation(self):
+    def test_chunk_metadata_preservation(self, chunker):
         """Test that chunk metadata is preserved correctly."""
         pages = [
             PageText(
@@ -95,7 +98,7 @@ class TestTokenAwareChunker:
             )
         ]
         
-        chunks = self.chunker.chunk_pages(pages, "test_doc")
+        chunks = chunker.chunk_pages(pages, "test_doc")
         
         assert len(chunks) == 1
         chunk = chunks[0]
@@ -107,7 +110,7 @@ class TestTokenAwareChunker:
         assert chunk.char_end > chunk.char_start
         assert chunk.token_count > 0
     
-    def test_chunk_validation(self):
+    def test_chunk_validation(self, chunker):
         """Test chunk validation."""
         # Create valid chunks
         valid_chunks = [
@@ -123,7 +126,7 @@ class TestTokenAwareChunker:
             )
         ]
         
-        assert self.chunker.validate_chunks(valid_chunks) is True
+        assert chunker.validate_chunks(valid_chunks) is True
         
         # Create invalid chunk (negative char_start)
         invalid_chunks = [
@@ -139,17 +142,17 @@ class TestTokenAwareChunker:
             )
         ]
         
-        assert self.chunker.validate_chunks(invalid_chunks) is False
+        assert chunker.validate_chunks(invalid_chunks) is False
     
-    def test_token_counting(self):
+    def test_token_counting(self, chunker):
         """Test token counting functionality."""
         text = "This is a test sentence for token counting."
-        token_count = self.chunker.get_token_count(text)
+        token_count = chunker.get_token_count(text)
         
         assert isinstance(token_count, int)
         assert token_count > 0
     
-    def test_empty_text_handling(self):
+    def test_empty_text_handling(self, chunker):
         """Test handling of empty text."""
         pages = [
             PageText(
@@ -161,11 +164,11 @@ class TestTokenAwareChunker:
             )
         ]
         
-        chunks = self.chunker.chunk_pages(pages, "test_doc")
+        chunks = chunker.chunk_pages(pages, "test_doc")
         
         assert len(chunks) == 0
     
-    def test_whitespace_only_text(self):
+    def test_whitespace_only_text(self, chunker):
         """Test handling of whitespace-only text."""
         pages = [
             PageText(
@@ -177,6 +180,39 @@ class TestTokenAwareChunker:
             )
         ]
         
-        chunks = self.chunker.chunk_pages(pages, "test_doc")
+        chunks = chunker.chunk_pages(pages, "test_doc")
         
         assert len(chunks) == 0
+    
+    def test_chunk_batch_round_trip(self, chunker, long_pages):
+        """Test conversion between chunks and the columnar ChunkBatch."""
+        chunks = chunker.chunk_pages(long_pages, "test_doc")
+        batch = ChunkBatch.from_chunks("test_doc", chunks)
+        
+        assert len(batch) == len(chunks)
+        assert batch.texts == [chunk.text for chunk in chunks]
+        assert batch.token_counts.tolist() == [chunk.token_count for chunk in chunks]
+        assert batch.to_chunks() == chunks
+    
+    def test_chunk_offsets_match_token_windows(self, chunker, long_pages):
+        """Test that chunk text and offsets line up with the decoded token windows."""
+        chunks = chunker.chunk_pages(long_pages, "test_doc")
+        tokens = chunker.encoding.encode(long_pages[0].text)
+        stride = chunker.chunk_size - chunker.chunk_overlap
+        
+        for i, chunk in enumerate(chunks):
+            window = tokens[i * stride:i * stride + chunker.chunk_size]
+            assert chunk.text == chunker.encoding.decode(window)
+            assert chunk.text == long_pages[0].text[chunk.char_start:chunk.char_end]
+    
+    def test_lone_surrogates_keep_offsets_aligned(self, chunker):
+        """Test that a page with lone surrogates is chunked with aligned offsets."""
+        text = "This is a sentence \ud835 with a broken glyph. " * 20
+        pages = [PageText(doc_id="test_doc", page=1, text=text, section=None, order=0)]
+        
+        chunks = chunker.chunk_pages(pages, "test_doc")
+        
+        assert len(chunks) > 1
+        assert chunks[-1].char_end == len(text)
+        for chunk in chunks:
+            assert chunk.text == text[chunk.char_start:chunk.char_end]
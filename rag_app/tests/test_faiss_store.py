@@ -0,0 +1,63 @@
+"""
+Tests for the FAISS vector store.
+"""
+
+from unittest.mock import Mock
+
+import faiss
+import numpy as np
+import pytest
+
+from config import settings
+from store.faiss_store import FAISSStore
+from utils.chunking import Chunk
+
+
+def _chunks(doc_id, count):
+    """Create placeholder chunks for a document."""
+    return [Chunk(doc_id, 1, None, f"{doc_id}:{i}", f"text {i}", 0, 6, 2) for i in range(count)]
+
+
+class TestFAISSStore:
+    """Test cases for FAISSStore."""
+    
+    @pytest.fixture(autouse=True)
+    def store(self, tmp_path, monkeypatch):
+        """Store writing to a temporary data directory, tile-searching above 10 vectors."""
+        monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+        monkeypatch.setattr(settings, "TILED_SEARCH_MIN_VECTORS", 10)
+        self.store = FAISSStore(Mock())
+        
+        rng = np.random.default_rng(0)
+        self.embeddings = rng.standard_normal((40, self.store.embedding_dim)).astype(np.float32)
+        self.embeddings /= np.linalg.norm(self.embeddings, axis=1, keepdims=True)
+        self.store._store_embeddings("doc", _chunks("doc", 40), self.embeddings)
+    
+    def test_large_flat_index_tile_searches_stored_embeddings(self):
+        """Test that tiled search over the stored embeddings matches the flat index."""
+        assert self.store._load_vectors("doc") is not None
+        assert sorted(path.name for path in settings.paths["indices"].glob("*.npy")) == ["doc.embeddings.npy"]
+        
+        results = self.store.search("doc", self.embeddings[3], k=5)
+        
+        index = self.store.load_index("doc")
+        _, expected = index.search(self.embeddings[3:4], 5)
+        assert [int(r["vector_id"]) for r in results] == expected[0].tolist()
+    
+    def test_save_index_leaves_no_temporary_files(self):
+        """Test that the index and metadata are swapped in from fully written temp files."""
+        assert not list(settings.paths["indices"].glob("*.tmp"))
+        assert len(self.store._load_metadata("doc")) == 40
+    
+    def test_l2_index_is_not_tile_searched(self):
+        """Test that tiled inner-product search is only used for inner-product flat indexes."""
+        self.store.save_index("doc", faiss.IndexFlatL2(self.store.embedding_dim), self.store._load_metadata("doc"))
+        
+        assert self.store._load_vectors("doc") is None
+    
+    def test_rebuilt_quantized_index_is_not_tile_searched(self):
+        """Test that a rebuilt non-flat index is searched through the index itself."""
+        self.store.rebuild_index("doc", kind="sq8")
+        
+        assert self.store._load_vectors("doc") is None
+        assert self.store.search("doc", self.embeddings[3], k=1)[0]["vector_id"] == "3"
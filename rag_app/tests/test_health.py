@@ -1,12 +1,4 @@
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from fastapi.testclient import TestClient
-from rag_app.app import app
-
-def test_health():
-    c = TestClient(app)
-    r = c.get("/health")
+def test_health(client):
+    r = client.get("/health")
     assert r.status_code == 200
     assert r.json().get("status") == "ok"
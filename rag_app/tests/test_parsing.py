@@ -0,0 +1,72 @@
+"""
+Tests for PDF parsing.
+"""
+
+import fitz
+import pytest
+
+from utils.parsing import PDFParser
+
+
+def _write_pdf(path, pages):
+    """Write a PDF with one page per list of (text, font size) lines."""
+    doc = fitz.open()
+    for lines in pages:
+        page = doc.new_page()
+        y = 72
+        for text, size in lines:
+            page.insert_text((72, y), text, fontsize=size)
+            y += size * 2
+    doc.save(path)
+    doc.close()
+
+
+class TestPDFParser:
+    """Test cases for PDFParser."""
+    
+    def test_headings_detected_against_document_body_size(self, tmp_path):
+        """Test that only spans larger than the document's body text become sections."""
+        body = [("Body text line.", 11)] * 5
+        pdf_path = tmp_path / "doc.pdf"
+        _write_pdf(pdf_path, [
+            [("Credit Agreement", 20)] + body,
+            body,
+            [("Body text, no title.", 12)] + body,
+        ])
+        
+        pages = PDFParser().parse_pdf(pdf_path, "doc")
+        
+        assert [page.page for page in pages] == [1, 2, 3]
+        assert pages[0].section == "Credit Agreement"
+        assert pages[1].section is None
+        assert pages[2].section is None
+    
+    def test_pdfium_backend_extracts_text_without_sections(self, tmp_path):
+        """Test that the pdfium backend keeps page text and leaves sections unset."""
+        pytest.importorskip("pypdfium2")
+        pdf_path = tmp_path / "doc.pdf"
+        _write_pdf(pdf_path, [[("Credit Agreement", 20), ("Body text line.", 11)]])
+        
+        pages = PDFParser(backend="pdfium").parse_pdf(pdf_path, "doc")
+        
+        assert len(pages) == 1
+        assert pages[0].text == "Credit Agreement\nBody text line."
+        assert pages[0].section is None
+    
+    def test_iter_pages_matches_block_parsing(self, tmp_path):
+        """Test that streamed pages match parse_pdf's plain block extraction."""
+        pdf_path = tmp_path / "doc.pdf"
+        _write_pdf(pdf_path, [[("Page one.", 11)], [], [("Page three.", 11)]])
+        
+        parser = PDFParser(detect_sections=False)
+        streamed = [(page.page, page.text) for page in parser.iter_pages(pdf_path, "doc")]
+        
+        assert streamed == [(page.page, page.text) for page in parser.parse_pdf(pdf_path, "doc")]
+        assert [page for page, _ in streamed] == [1, 3]
+    
+    def test_lone_surrogates_replaced_in_page_text(self):
+        """Test that lone surrogates from broken glyph maps become U+FFFD."""
+        page = PDFParser()._build_page_text("Broken \ud835 glyph", "doc", 0)
+        
+        assert page.text == "Broken \ufffd glyph"
+        page.text.encode("utf-8")
@@ -2,6 +2,9 @@
 Tests for retrieval functionality.
 """
 
+import asyncio
+import base64
+
 import pytest
 import numpy as np
 from unittest.mock import Mock, patch
@@ -42,6 +45,17 @@ class TestHybridRetriever:
         
         assert chunk2_score > chunk3_score
     
+    def test_reciprocal_rank_fusion_top_n_keeps_tie_order(self):
+        """Test that hits tied at the top_n cutoff keep insertion order (FAISS first)."""
+        faiss_results = [{"chunk_id": f"faiss{i}", "text": "", "faiss_score": 0.0} for i in range(20)]
+        fts_results = [{"chunk_id": f"fts{i}", "text": "", "bm25_score": 0.0} for i in range(20)]
+        
+        full = self.retriever._reciprocal_rank_fusion(faiss_results, fts_results)
+        top = self.retriever._reciprocal_rank_fusion(faiss_results, fts_results, top_n=7)
+        
+        assert [r["chunk_id"] for r in top] == [r["chunk_id"] for r in full[:7]]
+        assert [r["chunk_id"] for r in top] == ["faiss0", "fts0", "faiss1", "fts1", "faiss2", "fts2", "faiss3"]
+    
     def test_rerank_candidates(self):
         """Test candidate reranking functionality."""
         # Mock candidates
@@ -101,12 +115,15 @@ class TestHybridRetriever:
         # Mock OpenAI response
         mock_response = Mock()
         mock_response.data = [Mock()]
-        mock_response.data[0].embedding = mock_embedding.tolist()
+        mock_response.data[0].embedding = base64.b64encode(mock_embedding.tobytes()).decode()
         
         self.mock_openai_client.embeddings.create.return_value = mock_response
         
         embedding = self.retriever._generate_query_embedding(question)
         
+        _, kwargs = self.mock_openai_client.embeddings.create.call_args
+        assert kwargs["encoding_format"] == "base64"
+        
         assert isinstance(embedding, np.ndarray)
         assert embedding.shape == (1536,)
         np.testing.assert_array_equal(embedding, mock_embedding)
@@ -163,6 +180,36 @@ class TestHybridRetriever:
             assert results[0]["chunk_id"] == "chunk1"
             assert results[0]["confidence"] == 0.8
     
+    def test_aretrieve_with_results(self):
+        """Test async retrieval queries both stores and fuses their results."""
+        doc_id = "test_doc"
+        question = "What is machine learning?"
+        
+        faiss_results = [
+            {"chunk_id": "chunk1", "text": "Machine learning is a subset of AI", "page": 1}
+        ]
+        fts_results = [
+            {"chunk_id": "chunk2", "text": "Deep learning uses neural networks", "page": 2}
+        ]
+        
+        with patch.object(self.retriever.faiss_store, 'search') as mock_faiss, \
+             patch.object(self.retriever.sqlite_store, 'bm25_search') as mock_fts, \
+             patch.object(self.retriever, '_generate_query_embedding') as mock_embedding, \
+             patch.object(self.retriever, '_rerank_candidates') as mock_rerank:
+            
+            mock_embedding.return_value = np.random.rand(1536)
+            mock_faiss.return_value = faiss_results
+            mock_fts.return_value = fts_results
+            mock_rerank.side_effect = lambda question, candidates: [
+                dict(candidate, confidence=0.8) for candidate in candidates
+            ]
+            
+            results = asyncio.run(self.retriever.aretrieve(doc_id, question))
+            
+            mock_faiss.assert_called_once()
+            mock_fts.assert_called_once_with(doc_id, question, self.retriever.fts_k)
+            assert {r["chunk_id"] for r in results} == {"chunk1", "chunk2"}
+    
     def test_get_retrieval_stats(self):
         """Test retrieval statistics gathering."""
         doc_id = "test_doc"
@@ -0,0 +1,65 @@
+"""
+Tests for the semantic search cache.
+"""
+
+import numpy as np
+from store.semantic_cache import SemanticCache
+
+
+def _unit_vector(seed: int, dim: int = 16) -> np.ndarray:
+    """Create a normalized (1, dim) float32 query embedding."""
+    vector = np.random.default_rng(seed).standard_normal((1, dim)).astype('float32')
+    return vector / np.linalg.norm(vector)
+
+
+class TestSemanticCache:
+    """Test cases for SemanticCache."""
+    
+    def setup_method(self):
+        """Setup test fixtures."""
+        self.cache = SemanticCache(dim=16, max_entries=2, similarity_threshold=0.97, ttl_seconds=60)
+        self.results = [{"chunk_id": "chunk1", "faiss_score": 0.9}]
+    
+    def test_hit_for_same_query(self):
+        """Test that an identical query is served from the cache."""
+        query = _unit_vector(0)
+        self.cache.add("doc", query, 5, self.results, index_mtime=1.0)
+        
+        cached = self.cache.lookup("doc", query, 5, index_mtime=1.0)
+        
+        assert cached == self.results
+        assert cached[0] is not self.results[0]  # Callers get their own copies
+    
+    def test_miss_for_different_query_doc_or_k(self):
+        """Test that dissimilar queries, other documents and other k values miss."""
+        query = _unit_vector(0)
+        self.cache.add("doc", query, 5, self.results, index_mtime=1.0)
+        
+        assert self.cache.lookup("doc", _unit_vector(1), 5, index_mtime=1.0) is None
+        assert self.cache.lookup("other_doc", query, 5, index_mtime=1.0) is None
+        assert self.cache.lookup("doc", query, 10, index_mtime=1.0) is None
+    
+    def test_stale_index_and_invalidate(self):
+        """Test that entries expire when the index changes or is invalidated."""
+        query = _unit_vector(0)
+        self.cache.add("doc", query, 5, self.results, index_mtime=1.0)
+        
+        assert self.cache.lookup("doc", query, 5, index_mtime=2.0) is None
+        assert len(self.cache) == 0
+        
+        self.cache.add("doc", query, 5, self.results, index_mtime=2.0)
+        self.cache.invalidate("doc")
+        
+        assert self.cache.lookup("doc", query, 5, index_mtime=2.0) is None
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted when full."""
+        queries = [_unit_vector(seed) for seed in range(3)]
+        self.cache.add("doc", queries[0], 5, self.results, index_mtime=1.0)
+        self.cache.add("doc", queries[1], 5, self.results, index_mtime=1.0)
+        self.cache.lookup("doc", queries[0], 5, index_mtime=1.0)
+        self.cache.add("doc", queries[2], 5, self.results, index_mtime=1.0)
+        
+        assert len(self.cache) == 2
+        assert self.cache.lookup("doc", queries[0], 5, index_mtime=1.0) is not None
+        assert self.cache.lookup("doc", queries[1], 5, index_mtime=1.0) is None
@@ -0,0 +1,132 @@
+"""
+Tests for the SQLite FTS5 store.
+"""
+
+import sqlite3
+
+import pytest
+
+from config import settings
+from store.bm25_index import BM25Index
+from store.sqlite_store import FTS_AND_MAX_TERMS, SQLiteStore
+from utils.chunking import Chunk
+
+
+def _chunks(doc_id, texts):
+    """Create one chunk per text for a document."""
+    return [
+        Chunk(doc_id, 1, None, f"{doc_id}:{i}", text, 0, len(text), len(text.split()))
+        for i, text in enumerate(texts)
+    ]
+
+
+def _fts_texts(store, doc_id, query):
+    """Search through FTS5 ranking, without the precomputed BM25 index."""
+    store._get_bm25_path(doc_id).unlink(missing_ok=True)
+    return [result["text"] for result in store.bm25_search(doc_id, query)]
+
+
+class TestSQLiteStore:
+    """Test cases for SQLiteStore."""
+    
+    @pytest.fixture(autouse=True)
+    def data_dir(self, tmp_path, monkeypatch):
+        """Write databases to a temporary data directory."""
+        monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+        settings.paths["sqlite"].mkdir(parents=True)
+    
+    def test_reingest_visible_to_other_store_instances(self):
+        """Test that a reader store sees a re-ingest made through another store."""
+        ingest_store, read_store = SQLiteStore(), SQLiteStore()
+        ingest_store.upsert_chunks("doc", _chunks("doc", ["alpha borrower text", "beta lender text"]))
+        
+        assert [r["text"] for r in read_store.bm25_search("doc", "lender")] == ["beta lender text"]
+        
+        ingest_store.upsert_chunks("doc", _chunks("doc", ["gamma borrower clause"]))
+        
+        assert [r["text"] for r in read_store.bm25_search("doc", "borrower")] == ["gamma borrower clause"]
+        assert read_store.bm25_search("doc", "lender") == []
+        assert read_store.get_stats("doc")["chunks_count"] == 1
+        assert not list(settings.paths["sqlite"].glob("*.tmp"))
+    
+    def test_bm25_index_from_another_build_is_not_used(self):
+        """Test that a BM25 index not matching the database falls back to FTS5 ranking."""
+        store = SQLiteStore()
+        store.upsert_chunks("doc", _chunks("doc", ["alpha borrower text", "beta lender text"]))
+        BM25Index.build([1], ["zebra"], build_id=1).save(store._get_bm25_path("doc"))
+        
+        assert store.bm25_search("doc", "zebra") == []
+        assert [r["text"] for r in store.bm25_search("doc", "lender")] == ["beta lender text"]
+    
+    def test_precomputed_search_follows_query_plan(self):
+        """Test that short queries require every term and long ones match any term."""
+        store = SQLiteStore()
+        store.upsert_chunks("doc", _chunks("doc", ["alpha borrower text", "beta lender text"]))
+        conn, _ = store._get_connection("doc")
+        assert store._get_bm25_index("doc").build_id == conn.execute("PRAGMA user_version").fetchone()[0]
+        
+        assert store.bm25_search("doc", "borrower lender") == []
+        assert len(store.bm25_search("doc", "alpha borrower beta lender")) == 2
+    
+    def test_sync_triggers_follow_row_writes_after_bulk_load(self):
+        """Test that FTS5 follows updates and deletes made after a bulk upsert."""
+        store = SQLiteStore()
+        store.upsert_chunks("doc", _chunks("doc", ["alpha borrower text", "beta lender text"]))
+        
+        conn = sqlite3.connect(str(store._get_db_path("doc")))
+        conn.execute("UPDATE chunks SET text = 'zeta borrower clause' WHERE chunk_id = 'doc:0'")
+        conn.execute("DELETE FROM chunks WHERE chunk_id = 'doc:1'")
+        conn.commit()
+        conn.close()
+        
+        assert _fts_texts(store, "doc", "zeta") == ["zeta borrower clause"]
+        assert _fts_texts(store, "doc", "alpha") == []
+        assert _fts_texts(store, "doc", "lender") == []
+
+
+class TestCompileFtsQuery:
+    """Test cases for compiling questions into FTS5 MATCH queries."""
+    
+    @pytest.fixture(autouse=True)
+    def store(self, tmp_path, monkeypatch):
+        """Store with one small document, searched through FTS5 ranking."""
+        monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+        settings.paths["sqlite"].mkdir(parents=True)
+        self.store = SQLiteStore()
+        self.store.upsert_chunks("doc", _chunks("doc", [
+            "the co-borrower signs the term loan",
+            "beta lender text near the end"
+        ]))
+    
+    def test_operator_words_are_quoted(self):
+        """Test that AND/OR/NOT/NEAR in questions are searched as plain words."""
+        assert self.store._compile_fts_query("borrower AND NOT lender") == '"borrower"* OR "AND" OR "NOT" OR "lender"*'
+        assert self.store._compile_fts_query("NEAR(beta lender)") == '"NEAR"* "beta"* "lender"*'
+        
+        assert _fts_texts(self.store, "doc", "lender NOT beta") == []
+        assert _fts_texts(self.store, "doc", "NEAR(beta lender)") == ["beta lender text near the end"]
+    
+    def test_punctuation_only_query_returns_no_rows(self):
+        """Test that a query without searchable terms returns nothing instead of raising."""
+        assert self.store._compile_fts_query('?!... "" -- *') == ""
+        
+        assert self.store.bm25_search("doc", "?!...") == []
+        assert _fts_texts(self.store, "doc", "?!...") == []
+    
+    def test_hyphenated_and_quoted_terms(self):
+        """Test that hyphenated words stay one phrase and user quotes are dropped."""
+        assert self.store._compile_fts_query('co-borrower "term loan"') == '"co-borrower"* "term"* "loan"*'
+        assert self.store._compile_fts_query("-- - x-") == '"x"'
+        
+        assert _fts_texts(self.store, "doc", 'co-borrower "term loan"') == ["the co-borrower signs the term loan"]
+    
+    def test_and_switches_to_or_above_max_terms(self):
+        """Test that short queries require every term and longer ones match any term."""
+        short_query = " ".join(["lender"] * (FTS_AND_MAX_TERMS - 1) + ["borrower"])
+        long_query = " ".join(["lender"] * FTS_AND_MAX_TERMS + ["borrower"])
+        
+        assert " OR " not in self.store._compile_fts_query(short_query)
+        assert self.store._compile_fts_query(long_query).count(" OR ") == FTS_AND_MAX_TERMS
+        
+        assert _fts_texts(self.store, "doc", short_query) == []
+        assert len(_fts_texts(self.store, "doc", long_query)) == 2
@@ -0,0 +1,56 @@
+"""
+Tests for upload handling.
+"""
+
+import asyncio
+import io
+
+import pytest
+from fastapi import UploadFile
+
+from utils.uploads import save_upload, ingest_guard, IngestInProgressError, UploadTooLargeError
+
+
+class TestSaveUpload:
+    """Test cases for save_upload."""
+    
+    def test_rejected_upload_keeps_existing_file(self, tmp_path):
+        """Test that an oversized re-upload leaves the previous file and no partial file."""
+        dest = tmp_path / "doc.pdf"
+        dest.write_bytes(b"previous")
+        upload = UploadFile(io.BytesIO(b"x" * 100))
+        
+        with pytest.raises(UploadTooLargeError):
+            asyncio.run(save_upload(upload, dest, max_size=10, chunk_size=8))
+        
+        assert dest.read_bytes() == b"previous"
+        assert list(tmp_path.iterdir()) == [dest]
+    
+    def test_successful_upload_replaces_file(self, tmp_path):
+        """Test that a complete upload replaces the destination file."""
+        dest = tmp_path / "doc.pdf"
+        dest.write_bytes(b"previous")
+        
+        size, _ = asyncio.run(save_upload(UploadFile(io.BytesIO(b"new")), dest, max_size=10))
+        
+        assert size == 3
+        assert dest.read_bytes() == b"new"
+        assert list(tmp_path.iterdir()) == [dest]
+
+
+class TestIngestGuard:
+    """Test cases for ingest_guard."""
+    
+    def test_concurrent_ingest_of_same_doc_id_rejected(self):
+        """Test that a doc_id can only be claimed once at a time, and is released after."""
+        with ingest_guard("doc"):
+            with pytest.raises(IngestInProgressError):
+                with ingest_guard("doc"):
+                    pass
+            
+            # Other documents are unaffected
+            with ingest_guard("other"):
+                pass
+        
+        with ingest_guard("doc"):
+            pass
@@ -3,18 +3,55 @@ Token-aware text chunking using tiktoken.
 Splits text into overlapping chunks while preserving metadata.
 """
 
+import itertools
 import logging
-import uuid
+import os
 from dataclasses import dataclass
-from typing import List, Optional
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional
 
+import numpy as np
 import tiktoken
 
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@lru_cache(maxsize=8)
+def _load_encoding(encoding_name: str) -> tiktoken.Encoding:
+    """Load a tiktoken encoding once per process; Encoding objects are read-only and thread-safe."""
+    return tiktoken.get_encoding(encoding_name)
+
+
+@lru_cache(maxsize=1024)
+def _count_tokens(encoding_name: str, text: str) -> int:
+    """Count the tokens of a text, memoized so repeated counts skip the tokenizer."""
+    return len(_load_encoding(encoding_name).encode_ordinary(text))
+
+
+def _get_encoding(model_name: str) -> tiktoken.Encoding:
+    """
+    Get the shared tiktoken encoding for a model.
+    
+    Cached by encoding name, so models sharing a BPE table share one Encoding.
+    
+    Args:
+        model_name: OpenAI model name
+        
+    Returns:
+        tiktoken Encoding
+    """
+    try:
+        encoding_name = tiktoken.encoding_name_for_model(model_name)
+    except KeyError:
+        # Fallback to cl100k_base encoding if model not found
+        encoding_name = "cl100k_base"
+        logger.warning(f"Model {model_name} not found, using cl100k_base encoding")
+    
+    return _load_encoding(encoding_name)
+
+
+@dataclass(slots=True)
 class Chunk:
     """Represents a text chunk with metadata."""
     doc_id: str
@@ -27,6 +64,69 @@ class Chunk:
     token_count: int
 
 
+@dataclass
+class ChunkBatch:
+    """Column-oriented view of a document's chunks for bulk consumers."""
+    doc_id: str
+    chunk_ids: List[str]
+    texts: List[str]
+    sections: List[Optional[str]]
+    pages: np.ndarray
+    char_starts: np.ndarray
+    char_ends: np.ndarray
+    token_counts: np.ndarray
+    
+    @classmethod
+    def from_chunks(cls, doc_id: str, chunks: List[Chunk]) -> "ChunkBatch":
+        """
+        Build a batch from a list of chunks.
+        
+        Args:
+            doc_id: Document identifier
+            chunks: Chunks of the document, in order
+            
+        Returns:
+            ChunkBatch holding one column per chunk field
+        """
+        count = len(chunks)
+        return cls(
+            doc_id=doc_id,
+            chunk_ids=[chunk.chunk_id for chunk in chunks],
+            texts=[chunk.text for chunk in chunks],
+            sections=[chunk.section for chunk in chunks],
+            pages=np.fromiter((chunk.page for chunk in chunks), dtype=np.int64, count=count),
+            char_starts=np.fromiter((chunk.char_start for chunk in chunks), dtype=np.int64, count=count),
+            char_ends=np.fromiter((chunk.char_end for chunk in chunks), dtype=np.int64, count=count),
+            token_counts=np.fromiter((chunk.token_count for chunk in chunks), dtype=np.int64, count=count)
+        )
+    
+    def __len__(self) -> int:
+        return len(self.chunk_ids)
+    
+    def to_chunks(self) -> List[Chunk]:
+        """Rebuild the row-oriented list of chunks."""
+        return [
+            Chunk(self.doc_id, page, section, chunk_id, text, char_start, char_end, token_count)
+            for page, section, chunk_id, text, char_start, char_end, token_count in zip(
+                self.pages.tolist(), self.sections, self.chunk_ids, self.texts,
+                self.char_starts.tolist(), self.char_ends.tolist(), self.token_counts.tolist()
+            )
+        ]
+    
+    def to_columns(self) -> Dict[str, Any]:
+        """Columns keyed by chunk field name, e.g. for building a DataFrame."""
+        return {
+            "doc_id": [self.doc_id] * len(self),
+            "page": self.pages,
+            "section": self.sections,
+            "chunk_id": self.chunk_ids,
+            "text": self.texts,
+            "char_start": self.char_starts,
+            "char_end": self.char_ends,
+            "token_count": self.token_counts
+        }
+
+
 class TokenAwareChunker:
     """Token-aware text chunker using tiktoken."""
     
@@ -42,13 +142,7 @@ class TokenAwareChunker:
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.logger = logger
-        
-        try:
-            self.encoding = tiktoken.encoding_for_model(model_name)
-        except KeyError:
-            # Fallback to cl100k_base encoding if model not found
-            self.encoding = tiktoken.get_encoding("cl100k_base")
-            self.logger.warning(f"Model {model_name} not found, using cl100k_base encoding")
+        self.encoding = _get_encoding(model_name)
     
     def chunk_pages(self, pages: List, doc_id: str) -> List[Chunk]:
         """
@@ -63,12 +157,25 @@ class TokenAwareChunker:
         """
         self.logger.info(f"Starting chunking for {doc_id}, pages_count={len(pages)}")
         
+        # Tokenize all non-empty pages in one call, parallelized inside tiktoken;
+        # isspace() avoids the full copy strip() would make of every page
+        text_pages = [page for page in pages if page.text and not page.text.isspace()]
+        token_lists = self.encoding.encode_ordinary_batch(
+            [page.text for page in text_pages],
+            num_threads=os.cpu_count() or 1
+        )
+        page_tokens = {id(page): tokens for page, tokens in zip(text_pages, token_lists)}
+        
+        # Chunk IDs are "<doc_id>:<n>", numbered in document order
+        chunk_numbers = itertools.count()
+        
         all_chunks = []
         char_offset = 0
         
         for page in pages:
-            page_chunks = self._chunk_page_text(page, char_offset)
-            all_chunks.extend(page_chunks)
+            tokens = page_tokens.get(id(page))
+            if tokens:
+                all_chunks.extend(self._chunk_page_text(page, char_offset, tokens, chunk_numbers))
             char_offset += len(page.text)
         
         avg_chunk_size = sum(c.token_count for c in all_chunks) / len(all_chunks) if all_chunks else 0
@@ -76,26 +183,23 @@ class TokenAwareChunker:
         
         return all_chunks
     
-    def _chunk_page_text(self, page, char_offset: int) -> List[Chunk]:
+    def _chunk_page_text(self, page, char_offset: int, tokens: List[int],
+                         chunk_numbers: Iterator[int]) -> List[Chunk]:
         """
         Chunk text from a single page.
         
         Args:
             page: PageText object
             char_offset: Character offset from start of document
+            tokens: Token IDs of the page text
+            chunk_numbers: Document-wide sequence used to number chunk IDs
             
         Returns:
             List of Chunk objects for this page
         """
-        if not page.text.strip():
-            return []
-        
-        # Tokenize the text
-        tokens = self.encoding.encode(page.text)
-        
         if len(tokens) <= self.chunk_size:
             # Text fits in one chunk
-            chunk_id = str(uuid.uuid4())
+            chunk_id = f"{page.doc_id}:{next(chunk_numbers)}"
             return [Chunk(
                 doc_id=page.doc_id,
                 page=page.page,
@@ -107,82 +211,79 @@ class TokenAwareChunker:
                 token_count=len(tokens)
             )]
         
-        # Split into overlapping chunks
-        chunks = []
-        start_idx = 0
+        # Character offset of every token boundary, so chunk text and positions
+        # are slices of the page text instead of tokenizer decodes
+        char_offsets = self._token_char_offsets(page.text, tokens)
         
-        while start_idx < len(tokens):
-            # Determine end index for this chunk
-            end_idx = min(start_idx + self.chunk_size, len(tokens))
-            
-            # Decode tokens back to text
-            chunk_tokens = tokens[start_idx:end_idx]
-            chunk_text = self.encoding.decode(chunk_tokens)
-            
-            # Calculate character positions
-            chunk_char_start = char_offset + self._get_char_position(page.text, tokens, start_idx)
-            chunk_char_end = char_offset + self._get_char_position(page.text, tokens, end_idx)
-            
-            # Create chunk
-            chunk_id = str(uuid.uuid4())
-            chunk = Chunk(
+        # Window bounds for all overlapping chunks at once; windows past the first
+        # one reaching the end of the page are dropped
+        stride = max(self.chunk_size - self.chunk_overlap, 1)
+        starts = np.arange(0, len(tokens), stride, dtype=np.int64)
+        ends = np.minimum(starts + self.chunk_size, len(tokens))
+        last = np.searchsorted(ends, len(tokens)) + 1
+        starts, ends = starts[:last], ends[:last]
+        
+        chunks = []
+        for start_idx, end_idx, page_char_start, page_char_end in zip(
+            starts.tolist(), ends.tolist(), char_offsets[starts].tolist(), char_offsets[ends].tolist()
+        ):
+            chunk_id = f"{page.doc_id}:{next(chunk_numbers)}"
+            chunks.append(Chunk(
                 doc_id=page.doc_id,
                 page=page.page,
                 section=page.section,
                 chunk_id=chunk_id,
-                text=chunk_text,
-                char_start=chunk_char_start,
-                char_end=chunk_char_end,
-                token_count=len(chunk_tokens)
-            )
-            chunks.append(chunk)
-            
-            # Move to next chunk with overlap
-            if end_idx >= len(tokens):
-                break
-            
-            start_idx = end_idx - self.chunk_overlap
-            if start_idx < 0:
-                start_idx = 0
+                text=page.text[page_char_start:page_char_end],
+                char_start=char_offset + page_char_start,
+                char_end=char_offset + page_char_end,
+                token_count=end_idx - start_idx
+            ))
         
         return chunks
     
-    def _get_char_position(self, text: str, tokens: List[int], token_idx: int) -> int:
+    def _token_char_offsets(self, text: str, tokens: List[int]) -> np.ndarray:
         """
-        Get character position for a given token index.
+        Get the character offset of every token boundary in a text.
+        
+        Token byte lengths are accumulated into byte offsets, which are mapped to
+        character offsets by counting UTF-8 lead bytes. A token boundary inside a
+        multi-byte character maps to the end of that character. Lone surrogates
+        are encoded with surrogatepass as 3 bytes, the size of the U+FFFD
+        tiktoken substitutes for them, so offsets stay aligned.
         
         Args:
             text: Original text
-            tokens: List of token IDs
-            token_idx: Token index
+            tokens: List of token IDs encoding the text
             
         Returns:
-            Character position in the text
+            Array of len(tokens) + 1 character offsets, starting at 0
         """
-        if token_idx <= 0:
-            return 0
-        if token_idx >= len(tokens):
-            return len(text)
+        byte_offsets = np.zeros(len(tokens) + 1, dtype=np.int64)
+        np.cumsum([len(piece) for piece in self.encoding.decode_tokens_bytes(tokens)], out=byte_offsets[1:])
         
-        # Decode tokens up to the given index
-        partial_tokens = tokens[:token_idx]
-        partial_text = self.encoding.decode(partial_tokens)
+        # chars_before[b] is the number of characters starting before byte b
+        text_bytes = np.frombuffer(text.encode("utf-8", "surrogatepass"), dtype=np.uint8)
+        chars_before = np.zeros(len(text_bytes) + 1, dtype=np.int64)
+        np.cumsum((text_bytes & 0xC0) != 0x80, out=chars_before[1:])
         
-        # Find the position in the original text
-        # This is an approximation - for exact positioning, we'd need more complex logic
-        return min(len(partial_text), len(text))
+        return chars_before[byte_offsets]
     
     def get_token_count(self, text: str) -> int:
         """
         Get the number of tokens in a text string.
         
+        Counts are cached per encoding and text, and special-token text is
+        counted as ordinary text, the same way chunk_pages tokenizes pages.
+        
         Args:
             text: Text to count tokens for
             
         Returns:
             Number of tokens
         """
-        return len(self.encoding.encode(text))
+        if not text:
+            return 0
+        return _count_tokens(self.encoding.name, text)
     
     def validate_chunks(self, chunks: List[Chunk]) -> bool:
         """
@@ -1,6 +1,11 @@
-import logging, sys, json
+import logging, sys
 from typing import Any
 
+import orjson
+
+# Attributes every LogRecord has; anything else on a record came from extra=
+_RESERVED_ATTRS = frozenset(logging.LogRecord("", 0, "", 0, "", None, None).__dict__) | {"message", "asctime"}
+
 class JsonFormatter(logging.Formatter):
     def format(self, record):
         base = {
@@ -8,11 +13,21 @@ class JsonFormatter(logging.Formatter):
             "message": record.getMessage(),
             "logger": record.name,
         }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS:
+                base[key] = value
         if record.exc_info:
             base["exc_info"] = self.formatException(record.exc_info)
-        return json.dumps(base)
+        return orjson.dumps(base, default=str).decode()
+
+_configured = False
 
 def setup_logging():
+    """Install the JSON handler on the root logger; only the first call has any effect."""
+    global _configured
+    if _configured:
+        return
+    _configured = True
     h = logging.StreamHandler(sys.stdout)
     h.setFormatter(JsonFormatter())
     root = logging.getLogger()
@@ -22,12 +37,14 @@ def setup_logging():
 
 def log_timing(logger: logging.Logger, operation: str, duration: float, **kwargs: Any) -> None:
     """Log timing information for operations."""
-    extra_info = ", ".join([f"{k}={v}" for k, v in kwargs.items()])
-    logger.info(f"Operation completed: {operation}, duration_seconds={duration}, {extra_info}")
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    logger.info("Operation completed: %s", operation,
+                extra={"operation": operation, "duration_seconds": duration, **kwargs})
 
 def log_error(logger: logging.Logger, error: Exception, context: str = "", **kwargs: Any) -> None:
     """Log error with context information."""
-    extra_info = ", ".join([f"{k}={v}" for k, v in kwargs.items()])
-    logger.error(f"Error in {context}: {str(error)}, error_type={type(error).__name__}, {extra_info}", exc_info=True)
-
-setup_logging()
+    if not logger.isEnabledFor(logging.ERROR):
+        return
+    logger.error("Error in %s: %s", context, error, exc_info=True,
+                 extra={"context": context, "error_type": type(error).__name__, **kwargs})
@@ -0,0 +1,50 @@
+"""
+Shared OpenAI client.
+One pooled HTTP client per process, so embedding and answer calls reuse connections.
+"""
+
+import importlib.util
+import logging
+from functools import lru_cache
+
+import httpx
+from openai import OpenAI
+
+from config import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Connection pool limits shared by all OpenAI calls in the process
+MAX_KEEPALIVE_CONNECTIONS = 20
+MAX_CONNECTIONS = 40
+
+# Seconds to wait for a response, and for a connection to be established
+REQUEST_TIMEOUT = 30.0
+CONNECT_TIMEOUT = 5.0
+
+
+@lru_cache(maxsize=1)
+def get_openai_client() -> OpenAI:
+    """
+    Get the process-wide OpenAI client.
+    
+    HTTP/2 is used when the h2 package is installed; otherwise connections are
+    still kept alive and pooled over HTTP/1.1.
+    
+    Returns:
+        OpenAI client
+    """
+    http2 = importlib.util.find_spec("h2") is not None
+    if not http2:
+        logger.info("h2 not installed, OpenAI client uses HTTP/1.1")
+    
+    http_client = httpx.Client(
+        http2=http2,
+        limits=httpx.Limits(
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            max_connections=MAX_CONNECTIONS
+        ),
+        timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT)
+    )
+    return OpenAI(api_key=settings.OPENAI_API_KEY, http_client=http_client)
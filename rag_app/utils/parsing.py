@@ -4,17 +4,86 @@ Extracts text from PDFs with page-level metadata and section detection.
 """
 
 import logging
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Iterator, List, Optional, Tuple
 
 import fitz  # PyMuPDF
+import numpy as np
+import orjson
 
 
 logger = logging.getLogger(__name__)
 
+# PDFs with more pages than this are parsed across worker processes
+PARALLEL_PARSE_MIN_PAGES = 16
 
-@dataclass
+# Pages handed to a worker per task, amortizing the cost of opening the PDF
+PAGES_PER_TASK = 16
+
+# Text extraction flags for the span walk, which only reads span text and size.
+# Image blocks are never built. Ligatures and whitespace are preserved: clearing
+# those flags makes MuPDF expand/normalize characters, i.e. it adds work.
+PYMUPDF_TEXT_FLAGS = (
+    fitz.TEXT_PRESERVE_LIGATURES
+    | fitz.TEXT_PRESERVE_WHITESPACE
+    | fitz.TEXT_MEDIABOX_CLIP
+    | fitz.TEXT_CID_FOR_UNKNOWN_UNICODE
+)
+
+# Percentile of the document's span font sizes taken as the body text size
+BODY_SIZE_PERCENTILE = 75
+
+# A page's largest span is a heading only if it is this much larger than body text
+HEADING_SIZE_RATIO = 1.15
+
+# Text extraction libraries PDFParser can use
+PDF_BACKENDS = ("pymupdf", "pdfium")
+
+# Lone UTF-16 surrogates, which PyMuPDF can emit for broken glyph maps; they
+# cannot be encoded as UTF-8, so storage and JSON serialization would reject them
+SURROGATE_PATTERN = re.compile("[\ud800-\udfff]")
+
+# Bumped whenever parse output changes, so stale caches are not reused
+PARSE_CACHE_VERSION = 2
+
+
+@lru_cache(maxsize=1)
+def get_parse_pool() -> ProcessPoolExecutor:
+    """
+    Get the process pool used to parse large PDFs.
+    
+    Workers are spawned rather than forked, since the parent runs threads
+    (server, FAISS, tokenizer) that must not be duplicated mid-operation.
+    """
+    return ProcessPoolExecutor(
+        max_workers=os.cpu_count() or 1,
+        mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def _parse_page_range(pdf_path: str, doc_id: str, start: int, stop: int,
+                      detect_sections: bool) -> List[Tuple["PageText", Optional["PageFonts"]]]:
+    """Parse pages [start, stop) of a PDF; runs in a worker process with its own document handle."""
+    parser = PDFParser(detect_sections=detect_sections)
+    doc = fitz.open(pdf_path)
+    try:
+        pages = []
+        for page_num in range(start, stop):
+            page_text, fonts = parser._extract_page_text(doc[page_num], doc_id, page_num)
+            if page_text:
+                pages.append((page_text, fonts))
+        return pages
+    finally:
+        doc.close()
+
+
+@dataclass(slots=True)
 class PageText:
     """Represents text extracted from a PDF page."""
     doc_id: str
@@ -24,20 +93,49 @@ class PageText:
     order: int = 0
 
 
+@dataclass
+class PageFonts:
+    """Font sizes seen on a page, used to detect headings against the whole document."""
+    sizes: np.ndarray  # Size of every non-blank span
+    heading: Optional[str]  # Largest-font short span that isn't a page number
+    heading_size: float
+
+
 class PDFParser:
     """PDF parser using PyMuPDF for text extraction."""
     
-    def __init__(self):
-        """Initialize the PDF parser."""
+    def __init__(self, detect_sections: bool = True, cache_dir: Optional[Path] = None,
+                 backend: str = "pymupdf"):
+        """
+        Initialize the PDF parser.
+        
+        Args:
+            detect_sections: Detect a heading per page. This needs PyMuPDF's
+                per-span "dict" output; without it pages are read as plain blocks.
+            cache_dir: Directory for parsed-page caches keyed by PDF content hash;
+                caching is disabled when None
+            backend: "pymupdf", or "pdfium" for pypdfium2's lighter range-based
+                text extraction, which leaves sections unset
+        """
+        if backend not in PDF_BACKENDS:
+            raise ValueError(f"Unknown PDF backend {backend!r}, expected one of {PDF_BACKENDS}")
+        
         self.logger = logger
+        self.detect_sections = detect_sections
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.backend = backend
     
-    def parse_pdf(self, pdf_path: Path, doc_id: str) -> List[PageText]:
+    def parse_pdf(self, pdf_path: Path, doc_id: str, cache_key: Optional[str] = None,
+                  force_refresh: bool = False, max_pages: Optional[int] = None) -> List[PageText]:
         """
         Parse a PDF file and extract text with page-level metadata.
         
         Args:
             pdf_path: Path to the PDF file
             doc_id: Document identifier
+            cache_key: Content hash of the PDF; parsed pages are cached under it
+            force_refresh: Re-parse and overwrite the cache even on a hit
+            max_pages: Only parse the first max_pages pages; None parses all
             
         Returns:
             List of PageText objects containing extracted text and metadata
@@ -52,139 +150,393 @@ class PDFParser:
         
         self.logger.info(f"Starting PDF parsing for {doc_id}, pdf_path={str(pdf_path)}")
         
+        cache_path = self._get_cache_path(cache_key, max_pages)
+        if cache_path is not None and not force_refresh:
+            pages = self._load_cached_pages(cache_path, doc_id)
+            if pages is not None:
+                self.logger.info(f"PDF parse cache hit for {doc_id}, cache_key={cache_key}, pages_count={len(pages)}")
+                return pages
+        
         try:
-            # Open PDF document
-            doc = fitz.open(pdf_path)
-            pages = []
-            
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                page_text = self._extract_page_text(page, doc_id, page_num)
-                if page_text:
-                    pages.append(page_text)
-            
-            doc.close()
+            if self.backend == "pdfium":
+                pages = list(self._iter_pages_pdfium(pdf_path, doc_id, max_pages))
+            else:
+                pages = self._parse_pages_pymupdf(pdf_path, doc_id, max_pages)
             
-            total_chars = sum(len(p.text) for p in pages)
+            total_chars = int(np.fromiter((len(p.text) for p in pages), dtype=np.int64, count=len(pages)).sum())
             self.logger.info(f"PDF parsing completed for {doc_id}, pages_count={len(pages)}, total_characters={total_chars}")
             
+            if cache_path is not None:
+                self._save_cached_pages(cache_path, pages)
+            
             return pages
             
         except Exception as e:
             self.logger.error(f"Failed to parse PDF {pdf_path}: {str(e)}", exc_info=True)
             raise
     
-    def _extract_page_text(self, page: fitz.Page, doc_id: str, page_num: int) -> Optional[PageText]:
+    def iter_pages(self, pdf_path: Path, doc_id: str, max_pages: Optional[int] = None) -> Iterator[PageText]:
+        """
+        Yield pages one at a time, so memory is bounded by the largest page.
+        
+        Pages are extracted sequentially as plain blocks and have no section:
+        heading detection needs font sizes from the whole document, which
+        parse_pdf provides. The parse cache is not used.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            doc_id: Document identifier
+            max_pages: Only parse the first max_pages pages; None parses all
+            
+        Yields:
+            PageText objects in page order
+            
+        Raises:
+            FileNotFoundError: If PDF file doesn't exist
+        """
+        pdf_path = Path(pdf_path)
+        if not pdf_path.exists():
+            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+        
+        if self.backend == "pdfium":
+            yield from self._iter_pages_pdfium(pdf_path, doc_id, max_pages)
+            return
+        
+        doc = fitz.open(pdf_path)
+        try:
+            for page_num in range(self._capped_page_count(doc_id, len(doc), max_pages)):
+                page_text = self._build_page_text(self._extract_block_text(doc[page_num]), doc_id, page_num)
+                if page_text:
+                    yield page_text
+        finally:
+            doc.close()
+    
+    def _parse_pages_pymupdf(self, pdf_path: Path, doc_id: str, max_pages: Optional[int]) -> List[PageText]:
+        """
+        Parse pages with PyMuPDF, across worker processes for large PDFs.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            doc_id: Document identifier
+            max_pages: Only parse the first max_pages pages; None parses all
+            
+        Returns:
+            List of PageText objects in page order
+        """
+        doc = fitz.open(pdf_path)
+        page_count = self._capped_page_count(doc_id, len(doc), max_pages)
+        
+        if page_count > PARALLEL_PARSE_MIN_PAGES and (os.cpu_count() or 1) > 1:
+            # PyMuPDF documents can't be pickled, so each worker opens its own
+            doc.close()
+            parsed = self._parse_pages_parallel(pdf_path, doc_id, page_count)
+        else:
+            parsed = []
+            for page_num in range(page_count):
+                page = doc[page_num]
+                page_text, fonts = self._extract_page_text(page, doc_id, page_num)
+                if page_text:
+                    parsed.append((page_text, fonts))
+            
+            doc.close()
+        
+        pages = [page_text for page_text, _ in parsed]
+        if self.detect_sections:
+            self._assign_sections(pages, [fonts for _, fonts in parsed])
+        
+        return pages
+    
+    def _iter_pages_pdfium(self, pdf_path: Path, doc_id: str, max_pages: Optional[int]) -> Iterator[PageText]:
+        """
+        Parse pages with pypdfium2's range-based text extraction.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            doc_id: Document identifier
+            max_pages: Only parse the first max_pages pages; None parses all
+            
+        Yields:
+            PageText objects in page order, without sections
+        """
+        import pypdfium2 as pdfium
+        
+        pdf = pdfium.PdfDocument(str(pdf_path))
+        try:
+            for page_num in range(self._capped_page_count(doc_id, len(pdf), max_pages)):
+                page = pdf[page_num]
+                textpage = page.get_textpage()
+                try:
+                    text = textpage.get_text_range()
+                finally:
+                    textpage.close()
+                    page.close()
+                
+                # pdfium ends lines with CRLF; keep non-empty lines, as block extraction does
+                lines = [line for line in text.splitlines() if line.strip()]
+                page_text = self._build_page_text("\n".join(lines).strip(), doc_id, page_num)
+                if page_text:
+                    yield page_text
+        finally:
+            pdf.close()
+    
+    def _capped_page_count(self, doc_id: str, page_count: int, max_pages: Optional[int]) -> int:
+        """Apply the max_pages cap to a document's page count."""
+        if max_pages is not None and page_count > max_pages:
+            self.logger.warning(f"Truncating {doc_id} to the first {max_pages} of {page_count} pages")
+            return max_pages
+        return page_count
+    
+    def _get_cache_path(self, cache_key: Optional[str], max_pages: Optional[int] = None) -> Optional[Path]:
+        """Get the parse cache file for a PDF hash; the extraction mode and page cap are part of the key."""
+        if self.cache_dir is None or not cache_key:
+            return None
+        if self.backend == "pdfium":
+            mode = "pdfium"
+        else:
+            mode = "sections" if self.detect_sections else "blocks"
+        if max_pages is not None:
+            mode += f".p{max_pages}"
+        return self.cache_dir / f"{cache_key}.{mode}.v{PARSE_CACHE_VERSION}.json"
+    
+    def _load_cached_pages(self, cache_path: Path, doc_id: str) -> Optional[List[PageText]]:
+        """
+        Load cached pages, relabelled with the requesting doc_id.
+        
+        Args:
+            cache_path: Parse cache file
+            doc_id: Document identifier
+            
+        Returns:
+            List of PageText objects, or None on a miss or unreadable cache
+        """
+        try:
+            cached = orjson.loads(cache_path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.logger.warning(f"Ignoring unreadable parse cache {cache_path}: {str(e)}")
+            return None
+        
+        return [PageText(doc_id=doc_id, **page) for page in cached]
+    
+    def _save_cached_pages(self, cache_path: Path, pages: List[PageText]) -> None:
+        """
+        Save parsed pages atomically; failures only cost a future re-parse.
+        
+        Args:
+            cache_path: Parse cache file
+            pages: Parsed pages
+        """
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+            tmp_path.write_bytes(orjson.dumps([
+                {"page": p.page, "text": p.text, "section": p.section, "order": p.order}
+                for p in pages
+            ]))
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            self.logger.warning(f"Failed to write parse cache {cache_path}: {str(e)}")
+    
+    def _parse_pages_parallel(self, pdf_path: Path, doc_id: str,
+                              page_count: int) -> List[Tuple[PageText, Optional[PageFonts]]]:
+        """
+        Parse a PDF in page ranges across the process pool.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            doc_id: Document identifier
+            page_count: Number of pages in the PDF
+            
+        Returns:
+            List of (PageText, PageFonts) pairs in page order
+        """
+        pool = get_parse_pool()
+        futures = [
+            pool.submit(_parse_page_range, str(pdf_path), doc_id, start,
+                        min(start + PAGES_PER_TASK, page_count), self.detect_sections)
+            for start in range(0, page_count, PAGES_PER_TASK)
+        ]
+        
+        # Ranges are submitted in order, so concatenating results keeps page order
+        pages = []
+        for future in futures:
+            pages.extend(future.result())
+        
+        self.logger.info(f"Parsed {page_count} pages for {doc_id} in {len(futures)} parallel tasks")
+        return pages
+    
+    def _extract_page_text(self, page: fitz.Page, doc_id: str,
+                           page_num: int) -> Tuple[Optional[PageText], Optional[PageFonts]]:
         """
         Extract text from a single PDF page.
         
+        Sections are left unset; they are assigned once font sizes of the
+        whole document are known.
+        
         Args:
             page: PyMuPDF page object
             doc_id: Document identifier
             page_num: Page number (0-indexed)
             
         Returns:
-            PageText object or None if no text found
+            Tuple of (PageText or None if no text found, PageFonts or None
+            when section detection is off)
         """
         try:
-            # Extract text blocks in reading order
-            text_dict = page.get_text("dict")
+            if not self.detect_sections:
+                return self._build_page_text(self._extract_block_text(page), doc_id, page_num), None
+            
+            # Extract text blocks in reading order, without image blocks
+            text_dict = page.get_text("dict", flags=PYMUPDF_TEXT_FLAGS)
             text_blocks = []
             
+            # Non-blank spans and their font sizes are gathered in the same walk
+            # for heading detection
+            span_candidates = []
+            sizes = []
+            
             for block in text_dict["blocks"]:
-                if "lines" in block:  # Text block
-                    block_text = ""
-                    for line in block["lines"]:
-                        line_text = ""
-                        for span in line["spans"]:
-                            line_text += span["text"]
-                        if line_text.strip():
-                            block_text += line_text + "\n"
+                if "lines" not in block:  # Not a text block
+                    continue
+                
+                block_lines = []
+                for line in block["lines"]:
+                    span_texts = []
+                    for span in line["spans"]:
+                        text = span["text"]
+                        span_texts.append(text)
+                        
+                        if text and not text.isspace():
+                            span_candidates.append(text)
+                            sizes.append(span["size"])
                     
-                    if block_text.strip():
-                        text_blocks.append(block_text.strip())
+                    line_text = "".join(span_texts)
+                    if line_text.strip():
+                        block_lines.append(line_text)
+                
+                block_text = "\n".join(block_lines).strip()
+                if block_text:
+                    text_blocks.append(block_text)
             
             # Combine all text blocks
             full_text = "\n\n".join(text_blocks)
             
-            if not full_text.strip():
-                self.logger.warning(f"No text found on page {page_num + 1}")
-                return None
-            
-            # Detect section/heading (simple heuristic based on font size)
-            section = self._detect_section(text_dict)
-            
-            return PageText(
-                doc_id=doc_id,
-                page=page_num + 1,  # Convert to 1-indexed
-                text=full_text,
-                section=section,
-                order=page_num
-            )
+            fonts = self._find_heading_candidate(span_candidates, np.array(sizes, dtype=np.float32))
+            return self._build_page_text(full_text, doc_id, page_num), fonts
             
         except Exception as e:
             self.logger.error(f"Failed to extract text from page {page_num + 1}: {str(e)}", exc_info=True)
-            return None
+            return None, None
     
-    def _detect_section(self, text_dict: dict) -> Optional[str]:
+    def _find_heading_candidate(self, texts: List[str], sizes: np.ndarray) -> PageFonts:
         """
-        Detect section/heading from text blocks using font size heuristic.
+        Find a page's heading candidate: the largest-font short span that isn't a page number.
         
         Args:
-            text_dict: PyMuPDF text dictionary for a page
+            texts: Non-blank span texts of the page
+            sizes: Font size of each span, aligned with texts
             
         Returns:
-            Section name if detected, None otherwise
+            PageFonts for the page
         """
-        try:
-            # Find the largest font size text (likely a heading)
-            max_font_size = 0
-            section_text = None
-            
-            for block in text_dict["blocks"]:
-                if "lines" in block:
-                    for line in block["lines"]:
-                        for span in line["spans"]:
-                            font_size = span["size"]
-                            text = span["text"].strip()
-                            
-                            # Consider it a heading if:
-                            # 1. Font size is larger than average
-                            # 2. Text is relatively short (likely a title)
-                            # 3. Text is not empty
-                            if (font_size > max_font_size and 
-                                len(text) < 100 and 
-                                text and
-                                not text.isdigit()):  # Skip page numbers
-                                
-                                max_font_size = font_size
-                                section_text = text
-            
-            # Only return section if it seems like a meaningful heading
-            if section_text and max_font_size > 10:  # Minimum font size threshold
-                return section_text
+        # Largest first, earliest span on ties; usually the first one qualifies
+        for i in np.argsort(-sizes, kind="stable").tolist():
+            stripped = texts[i].strip()
+            if len(stripped) < 100 and not stripped.isdigit():
+                heading = SURROGATE_PATTERN.sub("\ufffd", stripped)
+                return PageFonts(sizes=sizes, heading=heading, heading_size=float(sizes[i]))
+        
+        return PageFonts(sizes=sizes, heading=None, heading_size=0.0)
+    
+    def _assign_sections(self, pages: List[PageText], fonts: List[PageFonts]) -> None:
+        """
+        Set each page's section to its heading candidate if it stands out from body text.
+        
+        The body text size is a percentile of all span sizes in the document, so a
+        page without a title doesn't promote its largest body span to a heading.
+        
+        Args:
+            pages: Parsed pages
+            fonts: Font sizes of each page, aligned with pages
+        """
+        if not pages:
+            return
+        
+        sizes = np.concatenate([page_fonts.sizes for page_fonts in fonts])
+        if len(sizes) == 0:
+            return
+        
+        threshold = np.percentile(sizes, BODY_SIZE_PERCENTILE) * HEADING_SIZE_RATIO
+        heading_sizes = np.fromiter((page_fonts.heading_size for page_fonts in fonts),
+                                    dtype=np.float32, count=len(fonts))
+        
+        for page, page_fonts, is_heading in zip(pages, fonts, (heading_sizes > threshold).tolist()):
+            page.section = page_fonts.heading if is_heading else None
+    
+    def _extract_block_text(self, page: fitz.Page) -> str:
+        """
+        Extract page text from PyMuPDF's "blocks" output, without per-span objects.
+        
+        Args:
+            page: PyMuPDF page object
             
-            return None
+        Returns:
+            Text blocks joined by blank lines, with empty lines dropped
+        """
+        text_blocks = []
+        
+        # Each block is (x0, y0, x1, y1, text, block_no, block_type); type 0 is text
+        for block in page.get_text("blocks", flags=fitz.TEXTFLAGS_BLOCKS):
+            if block[6] != 0:
+                continue
+            lines = [line for line in block[4].split("\n") if line.strip()]
+            if lines:
+                text_blocks.append("\n".join(lines).strip())
+        
+        return "\n\n".join(text_blocks)
+    
+    def _build_page_text(self, full_text: str, doc_id: str, page_num: int) -> Optional[PageText]:
+        """
+        Wrap extracted page text in a PageText.
+        
+        Args:
+            full_text: Extracted page text; lone surrogates are replaced with U+FFFD
+            doc_id: Document identifier
+            page_num: Page number (0-indexed)
             
-        except Exception as e:
-            self.logger.warning(f"Failed to detect section: {str(e)}")
+        Returns:
+            PageText object or None if no text found
+        """
+        if not full_text.strip():
+            self.logger.warning(f"No text found on page {page_num + 1}")
             return None
+        
+        return PageText(
+            doc_id=doc_id,
+            page=page_num + 1,  # Convert to 1-indexed
+            text=SURROGATE_PATTERN.sub("\ufffd", full_text),
+            order=page_num
+        )
     
-    def get_pdf_info(self, pdf_path: Path) -> dict:
+    def get_pdf_info(self, pdf_path: Path, max_pages: Optional[int] = None) -> dict:
         """
         Get basic information about a PDF file.
         
         Args:
             pdf_path: Path to the PDF file
+            max_pages: Page cap used for parsing, reported as "truncated"
             
         Returns:
             Dictionary with PDF metadata
         """
+        pdf_path = Path(pdf_path)
+        
         try:
-            doc = fitz.open(pdf_path)
-            metadata = doc.metadata
-            page_count = len(doc)
-            doc.close()
+            # Only the trailer/Info dictionary and page count are read; no page is loaded
+            with fitz.open(str(pdf_path), filetype="pdf") as doc:
+                metadata = doc.metadata or {}
+                page_count = doc.page_count
             
             return {
                 "page_count": page_count,
@@ -195,7 +547,8 @@ class PDFParser:
                 "producer": metadata.get("producer", ""),
                 "creation_date": metadata.get("creationDate", ""),
                 "modification_date": metadata.get("modDate", ""),
-                "file_size": pdf_path.stat().st_size
+                "file_size": pdf_path.stat().st_size,
+                "truncated": max_pages is not None and page_count > max_pages
             }
             
         except Exception as e:
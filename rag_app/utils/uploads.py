@@ -0,0 +1,101 @@
+"""
+Upload handling utilities.
+Streams uploaded files to disk in bounded chunks and serializes ingestions per doc_id.
+"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Tuple
+
+from fastapi import UploadFile
+
+# Bytes read from the upload and written to disk per step
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+
+# doc_ids with an ingestion in progress; uploads, databases and index temp
+# files are all per doc_id, so two ingestions of one doc_id must not overlap
+_active_ingests = set()
+_active_ingests_lock = threading.Lock()
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size limit."""
+
+
+class IngestInProgressError(RuntimeError):
+    """Raised when a doc_id is already being ingested."""
+
+
+@contextmanager
+def ingest_guard(doc_id: str) -> Iterator[None]:
+    """
+    Claim a doc_id for the duration of an upload and its ingestion.
+    
+    Args:
+        doc_id: Document identifier
+    
+    Raises:
+        IngestInProgressError: If the doc_id is already being ingested
+    """
+    with _active_ingests_lock:
+        if doc_id in _active_ingests:
+            raise IngestInProgressError(f"Ingestion of {doc_id} is already in progress")
+        _active_ingests.add(doc_id)
+    try:
+        yield
+    finally:
+        with _active_ingests_lock:
+            _active_ingests.discard(doc_id)
+
+
+async def save_upload(file: UploadFile, dest: Path, max_size: int,
+                      chunk_size: int = UPLOAD_CHUNK_SIZE) -> Tuple[int, str]:
+    """
+    Stream an uploaded file to disk without buffering it whole in memory.
+    
+    Disk writes run in a worker thread so the event loop stays responsive.
+    The limit is enforced while streaming, so oversized uploads are
+    aborted early. Data is streamed to a temporary file next to dest and
+    only moved onto dest once complete, so a failed upload never replaces
+    or removes an existing file at dest. The content is hashed
+    as it streams, so callers get a cache key without re-reading the file.
+    
+    Args:
+        file: Uploaded file
+        dest: Destination path
+        max_size: Maximum allowed size in bytes
+        chunk_size: Bytes per read/write step
+    
+    Returns:
+        Tuple of (bytes written, MD5 hex digest of the content)
+    
+    Raises:
+        UploadTooLargeError: If the upload exceeds max_size
+    """
+    if file.size and file.size > max_size:
+        raise UploadTooLargeError(f"Upload of {file.size} bytes exceeds limit of {max_size} bytes")
+    
+    total_size = 0
+    digest = hashlib.md5(usedforsecurity=False)
+    dest = Path(dest)
+    fd, temp_path = tempfile.mkstemp(dir=dest.parent, prefix=f".{dest.name}.", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            while chunk := await file.read(chunk_size):
+                total_size += len(chunk)
+                if total_size > max_size:
+                    raise UploadTooLargeError(f"Upload exceeds limit of {max_size} bytes")
+                digest.update(chunk)
+                await asyncio.to_thread(buffer.write, chunk)
+        os.replace(temp_path, dest)
+    except BaseException:
+        Path(temp_path).unlink(missing_ok=True)
+        raise
+    
+    return total_size, digest.hexdigest()
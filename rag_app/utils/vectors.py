@@ -0,0 +1,48 @@
+"""
+Embedding vector kernels.
+L2 normalization specialized for the fixed embedding dimension when Numba is available.
+"""
+
+import math
+
+import faiss
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:  # Numba is optional; fall back to FAISS
+    njit = None
+
+
+EMBEDDING_DIM = 1536  # text-embedding-3-small dimension
+
+
+if njit is not None:
+    @njit(cache=True, fastmath=True, parallel=True)
+    def _normalize_1536(vectors):
+        # Constant trip count lets LLVM fully vectorize the inner loops
+        for i in prange(vectors.shape[0]):
+            norm_sq = 0.0
+            for j in range(1536):
+                norm_sq += vectors[i, j] * vectors[i, j]
+            if norm_sq > 0.0:
+                inv_norm = 1.0 / math.sqrt(norm_sq)
+                for j in range(1536):
+                    vectors[i, j] *= inv_norm
+
+
+def normalize_embeddings(vectors: np.ndarray) -> None:
+    """
+    L2-normalize the rows of an embedding matrix in place.
+    
+    Args:
+        vectors: C-contiguous float32 array of shape (N, dim)
+    """
+    if (njit is not None and
+        vectors.ndim == 2 and
+        vectors.shape[1] == EMBEDDING_DIM and
+        vectors.dtype == np.float32 and
+        vectors.flags.c_contiguous):
+        _normalize_1536(vectors)
+    else:
+        faiss.normalize_L2(vectors)
@@ -2,6 +2,7 @@
 Working FastAPI app with lazy loading of heavy dependencies.
 """
 
+import asyncio
 import logging
 import time
 from pathlib import Path
@@ -10,14 +11,15 @@ from typing import Optional
 from fastapi import FastAPI, File, UploadFile, HTTPException
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from openai import OpenAI
 
 from config import settings
 from models import (
     IngestRequest, IngestResponse, QueryRequest, QueryResponse,
-    HealthResponse, ErrorResponse
+    HealthResponse, ErrorResponse, DOC_ID_PATTERN
 )
 from utils.logging import setup_logging, log_timing, log_error
+from utils.openai_client import get_openai_client
+from utils.uploads import save_upload, ingest_guard, IngestInProgressError, UploadTooLargeError
 
 # Setup logging
 setup_logging()
@@ -40,18 +42,10 @@ app.add_middleware(
 )
 
 # Global variables for lazy loading
-openai_client = None
 ingester = None
 retriever = None
 answer_generator = None
 
-def get_openai_client():
-    """Get or create OpenAI client."""
-    global openai_client
-    if openai_client is None:
-        openai_client = OpenAI(api_key=settings.openai_api_key)
-    return openai_client
-
 def get_ingester():
     """Get or create document ingester."""
     global ingester
@@ -76,6 +70,12 @@ def get_answer_generator():
         answer_generator = AnswerGenerator(get_openai_client())
     return answer_generator
 
+def prewarm_services():
+    """Create the lazy services and load the reranker model ahead of the first request."""
+    get_ingester()
+    get_retriever().reranker
+    get_answer_generator()
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize the application on startup."""
@@ -92,6 +92,13 @@ async def startup_event():
     
     # Ensure data directories exist
     settings.setup_directories()
+    
+    # Pay import and model-load costs now rather than on the first request;
+    # off by default so dev and test startups stay fast
+    if settings.PREWARM:
+        await asyncio.to_thread(prewarm_services)
+        logger.info("Services prewarmed")
+    
     logger.info("Application startup completed")
 
 @app.get("/health", response_model=HealthResponse)
@@ -102,18 +109,18 @@ async def health_check():
 @app.post("/ingest", response_model=IngestResponse)
 async def ingest_document(
     doc_id: str,
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    force_refresh: bool = False
 ):
     """
     Ingest a PDF document into the RAG system.
     """
     start_time = time.time()
-    logger.info(f"Starting document ingestion", doc_id=doc_id, filename=file.filename)
+    logger.info(f"Starting document ingestion for doc_id={doc_id}, filename={file.filename}")
     
     try:
         # Validate doc_id format
-        import re
-        if not re.match(r'^[a-zA-Z0-9_\-]+$', doc_id):
+        if not DOC_ID_PATTERN.fullmatch(doc_id):
             raise HTTPException(
                 status_code=400,
                 detail="doc_id must contain only alphanumeric characters, underscores, and hyphens"
@@ -126,24 +133,26 @@ async def ingest_document(
                 detail="File must be a PDF (application/pdf)"
             )
         
-        # Check file size
-        if file.size and file.size > settings.max_upload_size:
-            raise HTTPException(
-                status_code=413,
-                detail=f"File size exceeds maximum allowed size of {settings.max_upload_size / (1024*1024):.1f}MB"
-            )
-        
-        # Save uploaded file
-        pdf_path = settings.docs_path / f"{doc_id}.pdf"
-        with open(pdf_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        # One ingestion per doc_id at a time, from upload through indexing
+        with ingest_guard(doc_id):
+            # Stream uploaded file to disk, enforcing the size limit as it arrives
+            pdf_path = settings.paths["docs"] / f"{doc_id}.pdf"
+            try:
+                file_size, content_hash = await save_upload(file, pdf_path, settings.MAX_UPLOAD_SIZE)
+            except UploadTooLargeError:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"File size exceeds maximum allowed size of {settings.MAX_UPLOAD_SIZE / (1024*1024):.1f}MB"
+                )
         
-        logger.info(f"Saved uploaded file", doc_id=doc_id, file_size=len(content))
+            logger.info(f"Saved uploaded file doc_id={doc_id}, file_size={file_size}")
         
-        # Ingest document
-        ingester = get_ingester()
-        response = ingester.ingest_document(pdf_path, doc_id)
+            # Ingest document
+            ingester = get_ingester()
+            response = await asyncio.to_thread(
+                ingester.ingest_document, pdf_path, doc_id,
+                cache_key=content_hash, force_refresh=force_refresh
+            )
         
         # Log total processing time
         total_time = time.time() - start_time
@@ -153,6 +162,11 @@ async def ingest_document(
         
     except HTTPException:
         raise
+    except IngestInProgressError:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Document {doc_id} is already being ingested"
+        )
     except Exception as e:
         log_error(logger, e, "document_ingestion", doc_id=doc_id)
         raise HTTPException(status_code=500, detail="Document ingestion failed")
@@ -163,13 +177,13 @@ async def query_document(request: QueryRequest):
     Query a document with a question.
     """
     start_time = time.time()
-    logger.info(f"Starting document query", doc_id=request.doc_id, question=request.question)
+    logger.info(f"Starting document query doc_id={request.doc_id}, question={request.question}")
     
     try:
         # Retrieve relevant chunks
         retrieve_start = time.time()
         retriever = get_retriever()
-        retrieved_results = retriever.retrieve(
+        retrieved_results = await retriever.aretrieve(
             doc_id=request.doc_id,
             question=request.question,
             k=request.k
@@ -180,7 +194,9 @@ async def query_document(request: QueryRequest):
         # Generate answer
         answer_start = time.time()
         answer_generator = get_answer_generator()
-        answer_result = answer_generator.generate_answer(
+        # The chat completion call blocks, so it runs off the event loop
+        answer_result = await asyncio.to_thread(
+            answer_generator.generate_answer,
             question=request.question,
             retrieved_results=retrieved_results,
             doc_id=request.doc_id
@@ -5,6 +5,7 @@ sys.path.append('.')
 from rag_app.config import settings
 from openai import OpenAI
 import numpy as np
+import base64
 
 def test_embeddings():
     client = OpenAI(api_key=settings.OPENAI_API_KEY)
@@ -12,10 +13,15 @@ def test_embeddings():
     try:
         response = client.embeddings.create(
             model=settings.OPENAI_EMBEDDING_MODEL,
-            input=["This is a test"]
+            input=["This is a test"],
+            encoding_format="base64"
         )
         
-        embeddings = np.array([data.embedding for data in response.data])
+        # base64 embeddings are raw float32 bytes
+        dim = len(base64.b64decode(response.data[0].embedding)) // 4
+        embeddings = np.empty((len(response.data), dim), dtype=np.float32)
+        for i, data in enumerate(response.data):
+            embeddings[i] = np.frombuffer(base64.b64decode(data.embedding), dtype=np.float32)
         print(f"Embedding shape: {embeddings.shape}")
         print(f"Embedding dtype: {embeddings.dtype}")
         print(f"First few values: {embeddings[0][:5]}")
@@ -1,4 +1,6 @@
 #!/usr/bin/env python3
+import cProfile
+import pstats
 import sys
 sys.path.append('.')
 
@@ -10,14 +12,23 @@ def test_pdf_parsing():
     
     try:
         print(f"Testing PDF parsing for: {pdf_path}")
-        pages = parser.parse_pdf(pdf_path, "test_doc")
-        print(f"Successfully parsed {len(pages)} pages")
-        if pages:
-            print(f"First page text length: {len(pages[0].text)}")
+        # Stream pages so only one page's text is held at a time
+        count = 0
+        total_chars = 0
+        for page in parser.iter_pages(pdf_path, "test_doc"):
+            if count == 0:
+                print(f"First page text length: {len(page.text)}")
+            count += 1
+            total_chars += len(page.text)
+        print(f"Successfully parsed {count} pages, {total_chars} characters")
     except Exception as e:
         print(f"Error parsing PDF: {e}")
         import traceback
         traceback.print_exc()
 
 if __name__ == "__main__":
+    profiler = cProfile.Profile()
+    profiler.enable()
     test_pdf_parsing()
+    profiler.disable()
+    pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)